@@ -0,0 +1,161 @@
+"""Benchmark the backend against synthetic procfs and gate on a baseline.
+
+python -m benchmarks                  # compare with benchmarks/baseline.json
+python -m benchmarks --save           # record a new baseline
+python -m benchmarks --tolerance 0.5  # allow 50% median regression
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from .harness import ROOT, fake_tree, load_main
+
+BASELINE_FORMAT = 1
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+
+def measure(fn, repeat, budget):
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < repeat:
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+        if len(samples) >= 5 and time.perf_counter() > deadline:
+            break
+    samples.sort()
+    return {
+        "median_us": round(statistics.median(samples) / 1000, 2),
+        "p99_us": round(
+            samples[min(len(samples) - 1, len(samples) * 99 // 100)] / 1000, 2
+        ),
+        "samples": len(samples),
+    }
+
+
+def operations(main):
+    clock = main.VirtualClock()
+    spy = main.DeckySpy
+    sampler = main.StatsThread(clock=clock)
+    sampler.leases.pin(sampler.collectors)
+    sampler.step()
+    plugin = main.Plugin()
+    plugin.stats_thread = sampler
+    loop = asyncio.new_event_loop()
+
+    def round_trip():
+        loop.run_until_complete(main.Plugin.thread_output(plugin, "get-memory"))
+
+    ops = {
+        "collector.get_cpu": spy.get_cpu,
+        "collector.get_memory": spy.get_memory,
+        "collector.get_top_k_mem_procs": lambda: spy.get_top_k_mem_procs(10),
+        "collector.get_boottime": spy.get_boottime,
+        "collector.get_battery": spy.get_battery,
+        "collector.get_net_interface": spy.get_net_interface,
+        "stats_thread.cycle": sampler.step,
+        "plugin.thread_output": round_trip,
+    }
+    for key in sampler.output:
+        ops[f"json.{key}"] = lambda key=key: json.dumps(
+            sampler.output[key]["result"], default=main.to_wire
+        )
+    return ops, loop
+
+
+def run(processes, repeat, budget, only=None):
+    main = load_main()
+    results = {}
+    for count in processes:
+        with fake_tree(main, count):
+            ops, loop = operations(main)
+            for name, fn in ops.items():
+                if only and not any(o in name for o in only):
+                    continue
+                key = f"{name}@{count}"
+                results[key] = measure(fn, repeat, budget)
+                print(
+                    f"{key:48s} median {results[key]['median_us']:>12.2f} us"
+                    f"  p99 {results[key]['p99_us']:>12.2f} us",
+                    flush=True,
+                )
+            loop.close()
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_us):
+    regressions = []
+    for key, current in results.items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            continue
+        limit = max(
+            previous["median_us"] * (1 + tolerance),
+            previous["median_us"] + min_delta_us,
+        )
+        if current["median_us"] > limit:
+            regressions.append(
+                f"{key}: median {current['median_us']} us > {limit:.2f} us "
+                f"(baseline {previous['median_us']} us, tolerance {tolerance:.0%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per op")
+    parser.add_argument("--only", action="append", help="substring filter on op names")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--min-delta-us",
+        type=float,
+        default=25.0,
+        help="ignore regressions smaller than this, to keep tiny ops from flaking",
+    )
+    parser.add_argument("--save", action="store_true")
+    args = parser.parse_args()
+
+    processes = [int(x) for x in args.processes.split(",")]
+    results = run(processes, args.repeat, args.budget, args.only)
+
+    if args.save:
+        with open(os.path.join(ROOT, "package.json")) as f:
+            version = json.load(f)["version"]
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {"format": BASELINE_FORMAT, "version": version, "results": results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save first")
+        return 1
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("format") != BASELINE_FORMAT:
+        print(f"baseline format {baseline.get('format')} != {BASELINE_FORMAT}")
+        return 1
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_us)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        return 1
+    print(f"no regressions against baseline {baseline['version']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
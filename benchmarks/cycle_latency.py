@@ -0,0 +1,61 @@
+"""Compare sampler cycle latency with sequential and parallel collectors.
+
+    python -m benchmarks.cycle_latency --processes 5000 --cycles 200
+
+Each cycle runs every collector once over a synthetic procfs, including a
+top-k process scan. "sequential" calls them one after another on the
+sampler thread, as StatsThread did before collectors were run concurrently
+on its pool ("parallel"). `--battery-delay-ms` adds a sleep to the battery
+read to stand in for a slow embedded-controller backed sysfs file.
+"""
+
+import argparse
+import time
+
+from .harness import fake_tree, load_main, percentiles
+
+
+def make_sampler(main, battery_delay):
+    def get_battery():
+        time.sleep(battery_delay)
+        return main.DeckySpy.get_battery()
+
+    collectors = {
+        "get-cpu": main.DeckySpy.get_cpu,
+        "get-memory": main.DeckySpy.get_memory,
+        "get-battery": get_battery,
+        "get-net-interface": main.DeckySpy.get_net_interface,
+        "get-top-k": lambda: main.DeckySpy.get_top_k_mem_procs(10),
+    }
+    return main.StatsThread(collectors=collectors)
+
+
+def measure(cycle, cycles):
+    samples = []
+    for _ in range(cycles):
+        begin = time.perf_counter()
+        cycle()
+        samples.append(time.perf_counter() - begin)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=5000)
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--battery-delay-ms", type=float, default=0)
+    args = parser.parse_args()
+    main = load_main()
+    with fake_tree(main, args.processes):
+        sampler = make_sampler(main, args.battery_delay_ms / 1000)
+
+        for name, parallel in (("sequential", False), ("parallel", True)):
+            sampler.parallel = parallel
+            sampler.collect()
+            samples = measure(sampler.collect, args.cycles)
+            print(f"{name:10s} {percentiles(samples)}")
+        sampler.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
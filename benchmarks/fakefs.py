@@ -0,0 +1,138 @@
+"""Synthesize fake /proc and /sys trees for hermetic benchmarks.
+
+    python -m benchmarks.fakefs /tmp/fakefs --processes 10000
+
+The resulting roots can be handed to `DeckySpy.set_roots(procfs, sysfs)`.
+"""
+
+import argparse
+import os
+import random
+
+PAGESIZE = os.sysconf("SC_PAGE_SIZE")
+PROC_NAMES = [
+    "steam",
+    "steamwebhelper",
+    "gamescope",
+    "pipewire",
+    "python3",
+    "kwin_wayland",
+    "systemd",
+    "reaper",
+    "wine64-preloader",
+    "a_process_name_longer_than_fifteen",
+]
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def make_proc(root, rng, processes, boot_time):
+    write(
+        os.path.join(root, "stat"),
+        "cpu  {} 0 {} {} {} 0 {} 0 0 0\n".format(
+            *(rng.randint(10_000, 1_000_000) for _ in range(5))
+        )
+        + "".join("cpu{} 1000 0 1000 10000 10 0 10 0 0 0\n".format(i) for i in range(8))
+        + "intr 0\nctxt 0\nbtime {}\nprocesses {}\n".format(boot_time, processes)
+        + "procs_running 1\nprocs_blocked 0\n",
+    )
+    total = 16 * 1024 * 1024
+    free = rng.randint(total // 10, total // 2)
+    write(
+        os.path.join(root, "meminfo"),
+        "MemTotal: {} kB\nMemFree: {} kB\nMemAvailable: {} kB\n"
+        "Buffers: {} kB\nCached: {} kB\nSwapCached: 0 kB\nShmem: 0 kB\n"
+        "Active: {} kB\nInactive: {} kB\nSReclaimable: {} kB\n"
+        "SwapTotal: {} kB\nSwapFree: {} kB\n".format(
+            total,
+            free,
+            free + total // 10,
+            total // 100,
+            total // 20,
+            total // 4,
+            total // 8,
+            total // 200,
+            1024 * 1024,
+            rng.randint(0, 1024 * 1024),
+        ),
+    )
+    write(os.path.join(root, "vmstat"), "pswpin 0\npswpout 0\n")
+    write(os.path.join(root, "uptime"), "1000.00 8000.00\n")
+    for pid in range(1, processes + 1):
+        name = rng.choice(PROC_NAMES)
+        pdir = os.path.join(root, str(pid))
+        fields = ["S", "1"] + ["0"] * 17 + [str(rng.randint(0, 100_000))] + ["0"] * 30
+        write(
+            os.path.join(pdir, "stat"),
+            "{} ({}) {}\n".format(pid, name[:15], " ".join(fields)),
+        )
+        vms = rng.randint(1_000, 1_000_000)
+        rss = rng.randint(100, vms)
+        write(os.path.join(pdir, "statm"), "{} {} 0 0 0 0 0\n".format(vms, rss))
+        write(os.path.join(pdir, "comm"), name[:15] + "\n")
+        write(os.path.join(pdir, "cmdline"), name + "\0")
+        write(
+            os.path.join(pdir, "status"),
+            "Name:\t{}\nState:\tS (sleeping)\n".format(name[:15]),
+        )
+
+
+def make_sys(root, rng, batteries, hwmon):
+    supply = os.path.join(root, "class", "power_supply")
+    os.makedirs(supply, exist_ok=True)
+    write(os.path.join(supply, "ACAD", "type"), "Mains\n")
+    write(os.path.join(supply, "ACAD", "online"), "0\n")
+    for i in range(batteries):
+        bat = os.path.join(supply, "BAT{}".format(i + 1))
+        full = 40_040_000
+        write(os.path.join(bat, "type"), "Battery\n")
+        write(os.path.join(bat, "status"), "Discharging\n")
+        write(os.path.join(bat, "energy_full"), "{}\n".format(full))
+        write(os.path.join(bat, "energy_now"), "{}\n".format(rng.randint(0, full)))
+        write(
+            os.path.join(bat, "power_now"),
+            "{}\n".format(rng.randint(5_000_000, 20_000_000)),
+        )
+        write(os.path.join(bat, "capacity"), "{}\n".format(rng.randint(0, 100)))
+    for i in range(hwmon):
+        sensor = os.path.join(root, "class", "hwmon", "hwmon{}".format(i))
+        write(os.path.join(sensor, "name"), "fake{}\n".format(i))
+        write(os.path.join(sensor, "temp1_label"), "Tctl\n")
+        write(
+            os.path.join(sensor, "temp1_input"),
+            "{}\n".format(rng.randint(30_000, 90_000)),
+        )
+        write(os.path.join(sensor, "temp1_crit"), "105000\n")
+
+
+def make_tree(root, processes=100, batteries=1, hwmon=2, seed=0):
+    """Build `root/proc` and `root/sys` and return their paths."""
+    rng = random.Random(seed)
+    procfs = os.path.join(root, "proc")
+    sysfs = os.path.join(root, "sys")
+    make_proc(procfs, rng, processes, boot_time=1_700_000_000)
+    make_sys(sysfs, rng, batteries, hwmon)
+    return procfs, sysfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root")
+    parser.add_argument("--processes", type=int, default=100)
+    parser.add_argument("--batteries", type=int, default=1)
+    parser.add_argument("--hwmon", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    procfs, sysfs = make_tree(
+        args.root, args.processes, args.batteries, args.hwmon, args.seed
+    )
+    print(procfs)
+    print(sysfs)
+
+
+if __name__ == "__main__":
+    main()
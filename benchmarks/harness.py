@@ -0,0 +1,108 @@
+"""Load main.py outside decky-loader, and helpers shared by the benchmarks.
+
+The loader injects `decky_plugin` and `settings` into the plugin's
+interpreter; off-device we provide minimal in-memory equivalents so the
+backend can be imported and driven directly.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import types
+
+from .fakefs import make_tree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MemorySettingsManager:
+    def __init__(self, name, settings_directory=None) -> None:
+        self.settings = {}
+
+    def read(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def getSetting(self, key, default):
+        return self.settings.get(key, default)
+
+    def setSetting(self, key, value):
+        self.settings[key] = value
+
+
+def install_loader_modules(home=None):
+    home = home or tempfile.mkdtemp(prefix="decky-spy-")
+    with open(os.path.join(ROOT, "package.json")) as f:
+        version = json.load(f)["version"]
+    dirs = {}
+    for name in ("settings", "runtime", "logs"):
+        dirs[name] = os.path.join(home, name)
+        os.makedirs(dirs[name], exist_ok=True)
+    os.environ.setdefault("DECKY_PLUGIN_SETTINGS_DIR", dirs["settings"])
+
+    logger = logging.getLogger("decky-spy")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    plugin = types.ModuleType("decky_plugin")
+    plugin.HOME = plugin.DECKY_USER_HOME = plugin.DECKY_HOME = home
+    plugin.DECKY_PLUGIN_VERSION = version
+    plugin.DECKY_PLUGIN_SETTINGS_DIR = dirs["settings"]
+    plugin.DECKY_PLUGIN_RUNTIME_DIR = dirs["runtime"]
+    plugin.DECKY_PLUGIN_LOG_DIR = dirs["logs"]
+    plugin.logger = logger
+    plugin.migrate_logs = plugin.migrate_settings = plugin.migrate_runtime = (
+        lambda *args: {}
+    )
+    settings = types.ModuleType("settings")
+    settings.SettingsManager = MemorySettingsManager
+    sys.modules.setdefault("decky_plugin", plugin)
+    sys.modules.setdefault("settings", settings)
+
+
+def load_main():
+    install_loader_modules()
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import main
+
+    return main
+
+
+@contextlib.contextmanager
+def fake_tree(main=None, processes=100):
+    # A synthetic /proc and /sys for the benchmark's duration; with `main`,
+    # DeckySpy reads from it until the block exits
+    with tempfile.TemporaryDirectory(prefix="decky-spy-fakefs-") as tmp:
+        procfs, sysfs = make_tree(os.path.join(tmp, "tree"), processes)
+        if main is None:
+            yield procfs, sysfs
+            return
+        main.DeckySpy.set_roots(procfs, sysfs)
+        try:
+            yield procfs, sysfs
+        finally:
+            main.DeckySpy.set_roots("/proc", "/sys")
+
+
+def percentiles(samples, unit="ms"):
+    # One line of median, p99 and max for durations in seconds
+    scale, width, digits = {"ms": (1e3, 8, 2), "us": (1e6, 9, 1)}[unit]
+    samples = sorted(samples)
+    if not samples:
+        return "no samples"
+    p99 = samples[min(len(samples) - 1, len(samples) * 99 // 100)]
+    return "  ".join(
+        f"{name} {value * scale:{width}.{digits}f} {unit}"
+        for name, value in (
+            ("median", statistics.median(samples)),
+            ("p99", p99),
+            ("max", samples[-1]),
+        )
+    )
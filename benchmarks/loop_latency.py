@@ -0,0 +1,79 @@
+"""Compare event-loop latency under the thread and asyncio samplers.
+
+    python -m benchmarks.loop_latency --processes 2000 --seconds 5
+
+A probe coroutine sleeps 5 ms at a time on the plugin's event loop and
+records how late each wakeup is while the sampler runs at a 100 ms tick
+over a synthetic procfs, including a top-k process scan. A consumer
+long-polls get-memory and records how long each publish takes to reach it.
+"""
+
+import argparse
+import asyncio
+import time
+
+from .harness import fake_tree, load_main, percentiles
+
+PROBE_INTERVAL = 0.005
+
+
+async def measure(main, mode, seconds):
+    collectors = {
+        "get-cpu": main.DeckySpy.get_cpu,
+        "get-memory": main.DeckySpy.get_memory,
+        "get-battery": main.DeckySpy.get_battery,
+        "get-net-interface": main.DeckySpy.get_net_interface,
+        "get-top-k": lambda: main.DeckySpy.get_top_k_mem_procs(10),
+    }
+    if mode == "asyncio":
+        sampler = main.AsyncSampler(collectors=collectors)
+    else:
+        sampler = main.StatsThread(collectors=collectors)
+        sampler.attach(asyncio.get_running_loop())
+    sampler.profiles = None
+    sampler.interval = 0.1
+    sampler.leases.pin(collectors)
+    published = {}
+    sampler.on_publish = lambda outputs: published.__setitem__(
+        "at", time.perf_counter()
+    )
+    sampler.start()
+
+    lateness = []
+    delivery = []
+    end = time.perf_counter() + seconds
+
+    async def probe():
+        while time.perf_counter() < end:
+            expected = time.perf_counter() + PROBE_INTERVAL
+            await asyncio.sleep(PROBE_INTERVAL)
+            lateness.append(time.perf_counter() - expected)
+
+    async def consumer():
+        seq = 0
+        while time.perf_counter() < end:
+            seq = await sampler.wait_for_update("get-memory", seq, 1)
+            if "at" in published:
+                delivery.append(time.perf_counter() - published["at"])
+
+    await asyncio.gather(probe(), consumer())
+    await sampler.shutdown(2)
+    return lateness, delivery, sampler.cycles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    main = load_main()
+    with fake_tree(main, args.processes):
+        for mode in ("thread", "asyncio"):
+            lateness, delivery, cycles = asyncio.run(measure(main, mode, args.seconds))
+            print(f"{mode:8s} cycles {cycles}")
+            print(f"  loop lateness  {percentiles(lateness, 'us')}")
+            print(f"  delivery       {percentiles(delivery, 'us')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compare the persistent-descriptor readers with psutil and plain reopening.
+
+    python -m benchmarks.procfs_readers --samples 20000
+
+For CPU and memory the reference is psutil, which reopens and fully parses
+/proc/stat and /proc/meminfo on each call. For the battery it is the
+previous sysfs parser, which opened every attribute file per sample. Each
+line shows the median time per sample and the peak Python heap allocated
+during one sample (tracemalloc).
+"""
+
+import argparse
+import contextlib
+import statistics
+import time
+import tracemalloc
+
+import psutil
+
+from .harness import fake_tree, load_main
+
+
+def reopen_sysfs_value(*paths):
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                data = f.read().strip()
+        except (FileNotFoundError, PermissionError):
+            continue
+        try:
+            return int(data)
+        except ValueError:
+            return data.decode(errors="replace")
+    return None
+
+
+def ns_per_sample(fn, samples):
+    times = []
+    for _ in range(samples):
+        begin = time.perf_counter_ns()
+        fn()
+        times.append(time.perf_counter_ns() - begin)
+    return statistics.median(times)
+
+
+def peak_bytes(fn):
+    fn()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        fn()
+        return tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument(
+        "--live", action="store_true", help="read the host's /proc and /sys"
+    )
+    args = parser.parse_args()
+    main = load_main()
+    spy = main.DeckySpy
+    reader_sysfs_value = main.read_sysfs_value
+
+    def reopen_battery():
+        main.read_sysfs_value = reopen_sysfs_value
+        try:
+            return spy.get_battery()
+        finally:
+            main.read_sysfs_value = reader_sysfs_value
+
+    cases = [
+        ("cpu", "psutil", lambda: psutil.cpu_percent(interval=None)),
+        ("cpu", "reader", spy.get_cpu),
+        ("memory", "psutil", lambda: (psutil.virtual_memory(), psutil.swap_memory())),
+        ("memory", "reader", spy.get_memory),
+        ("battery", "reopen", reopen_battery),
+        ("battery", "reader", spy.get_battery),
+    ]
+    with contextlib.nullcontext() if args.live else fake_tree(main, 10):
+        if reopen_battery() != spy.get_battery():
+            raise SystemExit("battery readers disagree")
+        for section, name, fn in cases:
+            ns = ns_per_sample(fn, args.samples)
+            print(
+                f"{section:8s} {name:7s} {ns / 1000:8.2f} us/sample"
+                f"  peak {peak_bytes(fn):6d} B/sample"
+            )
+
+
+if __name__ == "__main__":
+    main()
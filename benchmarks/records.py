@@ -0,0 +1,81 @@
+"""Measure per-sample memory and garbage-collector activity of the sampler.
+
+    python -m benchmarks.records --processes 1000 --hours 1
+
+Per-sample memory is the deep size of one result of each collector: its
+objects and their bytes (sys.getsizeof), shared small ints and strings
+included. GC activity is the number of collections per generation over a
+simulated run at 1 Hz with every default collector plus a top-k scan each
+tick, of which some are the sampler's own idle-window collections.
+
+The run fails if the sampler's allocated-blocks counter shows steady-state
+growth: a mean above --max-block-growth pymalloc blocks per cycle.
+"""
+
+import argparse
+import gc
+import sys
+
+from .harness import fake_tree, load_main
+
+
+def deep_size(obj, seen=None):
+    # (objects, bytes) reachable from obj
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0, 0
+    seen.add(id(obj))
+    objects, size = 1, sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        children = [*obj.keys(), *obj.values()]
+    elif isinstance(obj, (list, tuple)):
+        children = obj
+    else:
+        slots = getattr(type(obj), "__slots__", ())
+        children = [getattr(obj, name) for name in slots if hasattr(obj, name)]
+    for child in children:
+        n, b = deep_size(child, seen)
+        objects += n
+        size += b
+    return objects, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=1)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--max-block-growth", type=float, default=0.5)
+    args = parser.parse_args()
+    main = load_main()
+    spy = main.DeckySpy
+    with fake_tree(main, args.processes):
+        collectors = {
+            "get-cpu": spy.get_cpu,
+            "get-memory": spy.get_memory,
+            "get-battery": spy.get_battery,
+            "get-net-interface": spy.get_net_interface,
+            "get-top-k": lambda: spy.get_top_k_mem_procs(args.k),
+        }
+        for key, fn in collectors.items():
+            objects, size = deep_size(fn()["result"])
+            print(f"{key:18s} {objects:5d} objects {size:7d} B/sample")
+
+        gc.collect()
+        before = [s["collections"] for s in gc.get_stats()]
+        sampler = main.simulate(args.hours * 3600, collectors=collectors)
+        after = [s["collections"] for s in gc.get_stats()]
+        rates = [(b - a) / args.hours for a, b in zip(before, after)]
+        print(
+            "gc collections/hour "
+            + "  ".join(f"gen{i} {r:8.0f}" for i, r in enumerate(rates))
+            + f"  (idle-window {sampler.idle_collections / args.hours:.0f})"
+        )
+        blocks = sampler.metrics()["gc"]["allocated_blocks"]
+        print(f"allocated blocks/cycle  mean {blocks['mean']:.2f}  max {blocks['max']}")
+        if blocks["mean"] > args.max_block_growth:
+            raise SystemExit("sampler cycles are accumulating allocations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measure how much a busy sampler slows a CPU-bound foreground workload.
+
+    python -m benchmarks.sched_interference --processes 2000 --seconds 3
+
+A forked "game" process spins on one core and counts loop iterations. The
+sampler shares that core and scans a synthetic procfs (top-k processes)
+every 50 ms under each scheduling setting. Foreground throughput is
+reported relative to a run with no sampler at all.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+from .harness import fake_tree, load_main
+
+SETTINGS = {
+    "default": {},
+    "nice 19": {"nice": 19},
+    "idle": {"policy": "idle"},
+}
+
+
+def foreground(cpu, seconds, result):
+    os.sched_setaffinity(0, {cpu})
+    count = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for _ in range(10000):
+            count += 1
+    result.value = count
+
+
+def run(main, cpu, seconds, scheduling):
+    context = multiprocessing.get_context("fork")
+    result = context.Value("q", 0)
+    sampler = None
+    if scheduling is not None:
+        collectors = {
+            "get-cpu": main.DeckySpy.get_cpu,
+            "get-top-k": lambda: main.DeckySpy.get_top_k_mem_procs(10),
+        }
+        sampler = main.StatsThread(collectors=collectors)
+        sampler.configure(scheduling=dict(scheduling, cpus=[cpu]))
+        sampler.profiles = None
+        sampler.interval = 0.05
+        sampler.leases.pin(collectors)
+        sampler.start()
+    process = context.Process(target=foreground, args=(cpu, seconds, result))
+    process.start()
+    process.join()
+    if sampler is None:
+        return result.value, None, None
+    sampler.stop()
+    sampler.join()
+    return result.value, sampler.cycles, sampler.thread_scheduling
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--cpu", type=int, default=min(os.sched_getaffinity(0)))
+    args = parser.parse_args()
+    main = load_main()
+    with fake_tree(main, args.processes):
+        alone, _, _ = run(main, args.cpu, args.seconds, None)
+        print(f"{'alone':8s} foreground {alone / args.seconds:14,.0f} it/s")
+        for name, scheduling in SETTINGS.items():
+            count, cycles, effective = run(main, args.cpu, args.seconds, scheduling)
+            state = effective.get("DeckySpySampler", {})
+            print(
+                f"{name:8s} foreground {count / args.seconds:14,.0f} it/s"
+                f" ({count / alone:6.1%})  sampler cycles {cycles:4d}"
+                f"  policy {state.get('policy')} nice {state.get('nice')}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Measure plugin load time and fail when it exceeds a budget.
+
+    python -m benchmarks.startup --runs 20 --budget-ms 100
+
+Each run is a fresh interpreter that imports main.py the way the loader
+does and awaits `Plugin._main` over a synthetic procfs, then reports the
+wall time of the import and the phases recorded by the plugin's
+StartupTimer (see get_startup_metrics). main.py is loaded from a fresh copy
+so that the first run compiles it, as the first load after an install does;
+that run is reported apart from the rest, which use the cached bytecode.
+
+The run fails if the median of import plus `_main` is above --budget-ms.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from .harness import ROOT, fake_tree, install_loader_modules
+
+# Run with `python -c` so that nothing but the loader stand-ins is imported
+# before main.py
+CHILD = """
+import sys, time
+from benchmarks.harness import install_loader_modules
+
+plugin_dir, procfs, sysfs = sys.argv[1:]
+install_loader_modules()
+sys.path.insert(0, plugin_dir)
+began = time.perf_counter()
+import main
+
+imported = time.perf_counter() - began
+main.DeckySpy.set_roots(procfs, sysfs)
+plugin = main.Plugin()
+
+
+async def load():
+    await main.Plugin._main(plugin)
+    await main.Plugin._unload(plugin)
+
+
+main.asyncio.run(load())
+startup = main.STARTUP.snapshot()
+startup["wall_import_ms"] = round(imported * 1e3, 3)
+startup["loaded_modules"] = sorted(sys.modules)
+print(main.json.dumps(startup))
+"""
+
+
+def run_once(plugin_dir, procfs, sysfs, env):
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, plugin_dir, procfs, sysfs],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def describe(name, runs):
+    total = [r["wall_import_ms"] + r["main_ms"] for r in runs]
+    phases = {}
+    for r in runs:
+        for key, ms in r["phases_ms"].items():
+            phases.setdefault(key, []).append(ms)
+    print(
+        f"{name:6s} import {statistics.median(r['wall_import_ms'] for r in runs):7.2f} ms"
+        f"  _main {statistics.median(r['main_ms'] for r in runs):7.2f} ms"
+        f"  total {statistics.median(total):7.2f} ms  (max {max(total):.2f} ms)"
+    )
+    print(
+        "       "
+        + "  ".join(f"{k} {statistics.median(v):.2f}" for k, v in phases.items())
+    )
+    return statistics.median(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=300)
+    parser.add_argument("--budget-ms", type=float, default=100)
+    args = parser.parse_args()
+    plugin_home = tempfile.TemporaryDirectory(prefix="decky-spy-startup-")
+    with fake_tree(processes=args.processes) as (procfs, sysfs), plugin_home as tmp:
+        plugin_dir = os.path.join(tmp, "plugin")
+        os.makedirs(plugin_dir)
+        shutil.copy(os.path.join(ROOT, "main.py"), plugin_dir)
+        env = dict(os.environ)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        first = run_once(plugin_dir, procfs, sysfs, env)
+        runs = [run_once(plugin_dir, procfs, sysfs, env) for _ in range(args.runs)]
+    describe("first", [first])
+    median = describe("cached", runs)
+    rare = {"ctypes", "gzip", "multiprocessing", "tracemalloc", "uuid"}
+    loaded = rare.intersection(runs[-1]["loaded_modules"])
+    if loaded:
+        print(f"loaded at startup: {', '.join(sorted(loaded))}")
+    if median > args.budget_ms:
+        raise SystemExit(
+            f"startup {median:.2f} ms is over the {args.budget_ms:g} ms budget"
+        )
+
+
+if __name__ == "__main__":
+    main()
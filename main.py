@@ -1,10 +1,24 @@
+import time
+
+# Marked before any other import so get_startup_metrics can report how long
+# loading this module took
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import gc
+import heapq
+import inspect
 import json
 import os
 import socket
+import struct
+import sys
 import threading
-import time
 import traceback
-import uuid
+from collections import deque, namedtuple
 from typing import Dict
 
 # The decky plugin module is located at decky-loader/plugin
@@ -14,6 +28,10 @@ import decky_plugin
 import psutil
 from settings import SettingsManager
 
+# ctypes, gzip, mmap, multiprocessing, tracemalloc and uuid are imported where
+# they are used: only on rare paths, and not worth their load time at startup
+IMPORTS_DONE = time.perf_counter()
+
 
 def wrap_return(data, code=0):
     return {"code": code, "data": data}
@@ -26,117 +44,2255 @@ af_map = {
 }
 
 
+class SystemClock:
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event, timeout):
+        return event.wait(max(timeout, 0))
+
+
+class VirtualClock:
+    # Time only moves when someone sleeps, so a simulated day of sampling
+    # completes as fast as the collectors run.
+    def __init__(self, start=0.0, epoch=None):
+        self.now = start
+        self.epoch = time.time() if epoch is None else epoch
+
+    def time(self):
+        return self.epoch + self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def wait(self, event, timeout):
+        # A pending event ends the wait at once; otherwise the timeout passes
+        if event.is_set():
+            return True
+        self.sleep(timeout)
+        return False
+
+
+SYSTEM_CLOCK = SystemClock()
+
+BatteryState = namedtuple("BatteryState", ["percent", "secsleft", "power_plugged"])
+
+
+class Record:
+    # Compact section payloads: fixed slots instead of nested dicts, turned
+    # into the frontend's dict shapes only when serialized, by passing
+    # `default=to_wire` to json.dumps
+    __slots__ = ()
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values() == other.values()
+
+    def __repr__(self):
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class MemoryRecord(Record):
+    __slots__ = ("total", "used", "percent", "swap_total", "swap_used", "swap_percent")
+
+    def __init__(self, total, used, percent, swap_total, swap_used, swap_percent):
+        self.total = total
+        self.used = used
+        self.percent = percent
+        self.swap_total = swap_total
+        self.swap_used = swap_used
+        self.swap_percent = swap_percent
+
+    def wire(self):
+        return {
+            "vmem": {"total": self.total, "used": self.used, "percent": self.percent},
+            "swap": {
+                "total": self.swap_total,
+                "used": self.swap_used,
+                "percent": self.swap_percent,
+            },
+        }
+
+
+class BatteryRecord(Record):
+    __slots__ = ("battery", "percent", "secsleft", "plugged")
+
+    def __init__(self, battery, percent, secsleft, plugged):
+        self.battery = battery
+        self.percent = percent
+        self.secsleft = secsleft
+        self.plugged = plugged
+
+    def wire(self):
+        return {
+            "battery": self.battery,
+            "percent": self.percent,
+            "secsleft": self.secsleft,
+            "plugged": self.plugged,
+        }
+
+
+class ProcessRecord(Record):
+    __slots__ = ("pid", "name", "rss", "vms")
+
+    def __init__(self, pid, name, rss, vms):
+        self.pid = pid
+        self.name = name
+        self.rss = rss
+        self.vms = vms
+
+    def wire(self):
+        return {
+            "pid": self.pid,
+            "name": self.name,
+            "mem": {"rss": self.rss, "vms": self.vms},
+        }
+
+
+class AddressRecord(Record):
+    __slots__ = ("family", "address", "netmask", "broadcast", "p2p")
+
+    def __init__(self, family, address, netmask, broadcast, p2p):
+        self.family = family
+        self.address = address
+        self.netmask = netmask
+        self.broadcast = broadcast
+        self.p2p = p2p
+
+    def wire(self):
+        return {
+            "family": self.family,
+            "address": self.address,
+            "netmask": self.netmask,
+            "broadcast": self.broadcast,
+            "p2p": self.p2p,
+        }
+
+
+class InterfaceRecord(Record):
+    __slots__ = ("name", "addresses")
+
+    def __init__(self, name, addresses):
+        self.name = name
+        self.addresses = addresses
+
+    def wire(self):
+        return {"name": self.name, "addresses": self.addresses}
+
+
+def to_wire(obj):
+    if isinstance(obj, Record):
+        return obj.wire()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FileReader:
+    # A procfs/sysfs file held open and re-read whole with preadv into a
+    # reused buffer; both regenerate their content on every read from offset
+    # 0. buf[0] is a newline so any line, the first included, can be found by
+    # searching for b"\n" + its name. Hold `lock` while reading and parsing.
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        self.lock = threading.Lock()
+        self.allocate(size)
+
+    def allocate(self, size):
+        self.buf = bytearray(size)
+        self.buf[0] = ord("\n")
+        self.targets = [memoryview(self.buf)[1:]]
+
+    def read(self):
+        # Returns the end of the content in `buf`
+        while True:
+            n = os.preadv(self.fd, self.targets, 0)
+            if n < len(self.buf) - 1:
+                return n + 1
+            self.allocate(len(self.buf) * 2)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def read_sysfs_value(*paths):
+    for path in paths:
+        try:
+            reader = DeckySpy.reader(path)
+            with reader.lock:
+                data = reader.buf[1 : reader.read()].strip()
+        except (FileNotFoundError, PermissionError):
+            continue
+        except OSError:
+            # e.g. ENODEV once the device is gone
+            DeckySpy.drop_reader(path)
+            continue
+        try:
+            return int(data)
+        except ValueError:
+            return data.decode(errors="replace")
+    return None
+
+
+def meminfo_bytes(buf, name, end):
+    # Value of a "<name>:   <n> kB" line of /proc/meminfo, or None
+    i = buf.find(name, 0, end)
+    if i < 0:
+        return None
+    i += len(name)
+    return int(buf[i : buf.index(b"k", i, end)]) * 1024
+
+
 class DeckySpy:
+    # Roots every collector reads from; point them at a synthetic tree with
+    # `set_roots` to sample something other than the live host.
+    PROCFS_PATH = "/proc"
+    SYSFS_PATH = "/sys"
+
+    # Open FileReaders by path, and /proc/stat's cpu line and the reading
+    # computed from it at the last get_cpu that took a new reading
+    READERS = {}
+    READERS_LOCK = threading.Lock()
+    LAST_CPU_TIMES = None
+    LAST_CPU = None
+    # /proc/stat counts jiffies of 1/CLK_TCK s per CPU: a window of a few of
+    # them, as after a wake() right behind a cycle, only resolves 0, 50 or
+    # 100%. get_cpu keeps its previous reading until 0.25 s have passed.
+    CPU_MIN_TICKS = 0.25 * os.sysconf("SC_CLK_TCK") * (os.cpu_count() or 1)
+
+    @staticmethod
+    def set_roots(procfs=None, sysfs=None):
+        if procfs is not None:
+            DeckySpy.PROCFS_PATH = procfs
+            psutil.PROCFS_PATH = procfs
+        if sysfs is not None:
+            DeckySpy.SYSFS_PATH = sysfs
+        with DeckySpy.READERS_LOCK:
+            readers, DeckySpy.READERS = DeckySpy.READERS, {}
+        for reader in readers.values():
+            reader.close()
+        DeckySpy.LAST_CPU_TIMES = DeckySpy.LAST_CPU = None
+
+    @staticmethod
+    def reader(path):
+        with DeckySpy.READERS_LOCK:
+            reader = DeckySpy.READERS.get(path)
+            if reader is None:
+                reader = DeckySpy.READERS[path] = FileReader(path)
+            return reader
+
+    @staticmethod
+    def drop_reader(path):
+        with DeckySpy.READERS_LOCK:
+            reader = DeckySpy.READERS.pop(path, None)
+        if reader is not None:
+            reader.close()
+
+    @staticmethod
+    def forget_readers():
+        # In a forked child, where the parent's locks may be held: start over
+        # and leave the inherited descriptors be
+        DeckySpy.READERS = {}
+        DeckySpy.READERS_LOCK = threading.Lock()
+
     @staticmethod
     def get_cpu():
-        cpu = psutil.cpu_percent(interval=1)
-        return {"result": cpu, "debug": ""}
+        # Usage since the previous call, i.e. over the sampler's last period,
+        # so sampling CPU never blocks or wakes the thread on its own.
+        # Same arithmetic as psutil.cpu_percent(interval=None), except that
+        # the first call reports the average since boot, marked stale.
+        reader = DeckySpy.reader(DeckySpy.PROCFS_PATH + "/stat")
+        with reader.lock:
+            end = reader.read()
+            line = reader.buf[4 : reader.buf.index(b"\n", 1, end)]
+        times = [int(x) for x in line.split()]
+        last = DeckySpy.LAST_CPU_TIMES
+        deltas = [max(b - a, 0) for a, b in zip(last or [0] * len(times), times)]
+        # guest and guest_nice are already counted in user and nice
+        total = sum(deltas[:8])
+        if last is not None and total < DeckySpy.CPU_MIN_TICKS:
+            # Too short a window; it grows until the next call
+            return dict(DeckySpy.LAST_CPU)
+        DeckySpy.LAST_CPU_TIMES = times
+        busy = total - deltas[3] - deltas[4]
+        cpu = round(busy / total * 100, 1) if total else 0.0
+        if last is None:
+            # The average since boot: something to show, but not current, and
+            # held by the short-window rule until a real reading is possible
+            out = {
+                "result": cpu,
+                "debug": "average since boot",
+                "stale": True,
+                "bootstrap": True,
+            }
+        else:
+            out = {"result": cpu, "debug": ""}
+        DeckySpy.LAST_CPU = out
+        return out
 
     @staticmethod
     def get_memory():
-        vmem = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-        return {
-            "result": {
-                "vmem": {
-                    "total": vmem.total,
-                    "used": vmem.used,
-                    "percent": vmem.percent,
-                },
-                "swap": {
-                    "total": swap.total,
-                    "used": swap.used,
-                    "percent": swap.percent,
-                },
-            },
-            "debug": "",
-        }
+        # Same figures as psutil.virtual_memory() and swap_memory(), parsed
+        # in place; psutil covers kernels missing the fields used here
+        reader = DeckySpy.reader(DeckySpy.PROCFS_PATH + "/meminfo")
+        with reader.lock:
+            end = reader.read()
+            buf = reader.buf
+            total = meminfo_bytes(buf, b"\nMemTotal:", end)
+            free = meminfo_bytes(buf, b"\nMemFree:", end)
+            avail = meminfo_bytes(buf, b"\nMemAvailable:", end)
+            buffers = meminfo_bytes(buf, b"\nBuffers:", end) or 0
+            cached = meminfo_bytes(buf, b"\nCached:", end) or 0
+            cached += meminfo_bytes(buf, b"\nSReclaimable:", end) or 0
+            swap_total = meminfo_bytes(buf, b"\nSwapTotal:", end)
+            swap_free = meminfo_bytes(buf, b"\nSwapFree:", end)
+        if total is None or free is None or not avail:
+            vmem = psutil.virtual_memory()
+            total, used, percent = vmem.total, vmem.used, vmem.percent
+        else:
+            used = total - free - cached - buffers
+            if used < 0:
+                used = total - free
+            if avail > total:
+                avail = free
+            percent = round((total - avail) / total * 100, 1) if total else 0.0
+        if swap_total is None or swap_free is None:
+            swap = psutil.swap_memory()
+            swap_total, swap_used, swap_percent = swap.total, swap.used, swap.percent
+        else:
+            swap_used = swap_total - swap_free
+            swap_percent = round(swap_used / swap_total * 100, 1) if swap_total else 0.0
+        record = MemoryRecord(total, used, percent, swap_total, swap_used, swap_percent)
+        return {"result": record, "debug": ""}
 
     @staticmethod
     def get_top_k_mem_procs(k=10):
-        procs = {
-            p.pid: {
-                "pid": p.pid,
-                "name": p.info["name"],
-                "mem": {
-                    "rss": p.info["memory_info"].rss,
-                    "vms": p.info["memory_info"].vms,
-                },
-            }
-            for p in psutil.process_iter(["name", "memory_info"])
+        # Records are only built for the k largest
+        procs = psutil.process_iter(["name", "memory_info"])
+        top = heapq.nlargest(k, procs, key=lambda p: p.info["memory_info"].rss)
+        return {
+            "result": [
+                ProcessRecord(
+                    p.pid,
+                    p.info["name"],
+                    p.info["memory_info"].rss,
+                    p.info["memory_info"].vms,
+                )
+                for p in top
+            ],
+            "debug": "",
         }
-        top = sorted(procs.values(), key=lambda x: x["mem"]["rss"], reverse=True)[:k]
-        return {"result": top, "debug": ""}
 
     @staticmethod
     def get_boottime() -> float:
         return {"result": psutil.boot_time(), "debug": ""}
 
+    @staticmethod
+    def sensors_battery():
+        # psutil.sensors_battery() rooted at SYSFS_PATH
+        supply = os.path.join(DeckySpy.SYSFS_PATH, "class", "power_supply")
+        try:
+            names = os.listdir(supply)
+        except FileNotFoundError:
+            return None
+        bats = [x for x in names if x.startswith("BAT") or "battery" in x.lower()]
+        if not bats:
+            return None
+        root = os.path.join(supply, sorted(bats)[0])
+        energy_now = read_sysfs_value(root + "/energy_now", root + "/charge_now")
+        power_now = read_sysfs_value(root + "/power_now", root + "/current_now")
+        energy_full = read_sysfs_value(root + "/energy_full", root + "/charge_full")
+        time_to_empty = read_sysfs_value(root + "/time_to_empty_now")
+
+        if energy_full is not None and energy_now is not None:
+            try:
+                percent = 100.0 * energy_now / energy_full
+            except ZeroDivisionError:
+                percent = 0.0
+        else:
+            percent = read_sysfs_value(root + "/capacity")
+            if not isinstance(percent, int):
+                return None
+
+        power_plugged = None
+        online = read_sysfs_value(
+            os.path.join(supply, "AC0", "online"), os.path.join(supply, "AC", "online")
+        )
+        if online is not None:
+            power_plugged = online == 1
+        else:
+            status = str(read_sysfs_value(root + "/status") or "").lower()
+            if status == "discharging":
+                power_plugged = False
+            elif status in ("charging", "full"):
+                power_plugged = True
+
+        if power_plugged:
+            secsleft = psutil.POWER_TIME_UNLIMITED
+        elif energy_now is not None and power_now is not None:
+            try:
+                secsleft = int(energy_now / power_now * 3600)
+            except ZeroDivisionError:
+                secsleft = psutil.POWER_TIME_UNKNOWN
+        elif time_to_empty is not None:
+            secsleft = int(time_to_empty * 60)
+            if secsleft < 0:
+                secsleft = psutil.POWER_TIME_UNKNOWN
+        else:
+            secsleft = psutil.POWER_TIME_UNKNOWN
+        return BatteryState(percent, secsleft, power_plugged)
+
     @staticmethod
     def get_battery() -> Dict[str, int | float]:
-        battery = psutil.sensors_battery()
+        battery = DeckySpy.sensors_battery()
         if battery is None:
-            return {
-                "result": {
-                    "battery": False,
-                    "percent": -1,
-                    "secsleft": -1,
-                    "plugged": True,
-                },
-                "debug": "",
-            }
+            return {"result": BatteryRecord(False, -1, -1, True), "debug": ""}
         return {
-            "result": {
-                "battery": True,
-                "percent": battery.percent,
-                "secsleft": battery.secsleft,
-                "plugged": battery.power_plugged,
-            },
+            "result": BatteryRecord(
+                True, battery.percent, battery.secsleft, battery.power_plugged
+            ),
             "debug": "",
         }
 
     @staticmethod
     def get_net_interface():
-        interfaces_info = []
-        for nic, addrs in psutil.net_if_addrs().items():
-            interface_info = {"name": nic, "addresses": []}
-            for addr in addrs:
-                interface_info["addresses"].append(
-                    {
-                        "family": af_map.get(addr.family, addr.family),
-                        "address": addr.address,
-                        "netmask": addr.netmask if addr.netmask else "",
-                        "broadcast": addr.broadcast if addr.broadcast else "",
-                        "p2p": addr.ptp if addr.ptp else "",
-                    }
-                )
-            interfaces_info.append(interface_info)
+        interfaces_info = [
+            InterfaceRecord(
+                nic,
+                [
+                    AddressRecord(
+                        af_map.get(addr.family, addr.family),
+                        addr.address,
+                        addr.netmask if addr.netmask else "",
+                        addr.broadcast if addr.broadcast else "",
+                        addr.ptp if addr.ptp else "",
+                    )
+                    for addr in addrs
+                ],
+            )
+            for nic, addrs in psutil.net_if_addrs().items()
+        ]
         return {"result": interfaces_info, "debug": ""}
 
 
-class StatsThread(threading.Thread):
+os.register_at_fork(after_in_child=DeckySpy.forget_readers)
+
+
+TRACE_FORMAT = "decky-spy-trace"
+TRACE_VERSION = 1
+
+
+class SelfMonitor:
+    # The plugin's own footprint. Always read from the live /proc, even when
+    # DeckySpy points at a synthetic tree, and called from the sampler thread
+    # so /proc/thread-self is the sampler itself.
+    CLK_TCK = os.sysconf("SC_CLK_TCK")
+    PAGESIZE = os.sysconf("SC_PAGE_SIZE")
+    ALERT_INTERVAL = 60
+    # Seconds: CPU times count in 1/CLK_TCK ticks, too coarse for rates over
+    # a shorter window
+    MIN_WINDOW = 1
+
+    def __init__(self, budget=0):
+        # CPU budget in percent of one core; 0 disables the alert
+        self.budget = budget
+        self.last = None
+        self.rates = {}
+        self.last_alert = 0
+
+    @staticmethod
+    def read_stat(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        # Skip past "pid (comm) " so spaces in the thread name can't shift fields
+        fields = data[data.rfind(b")") + 2 :].split()
+        return fields
+
+    @staticmethod
+    def read_wakeups():
+        total = 0
+        for tid in os.listdir("/proc/self/task"):
+            try:
+                with open(f"/proc/self/task/{tid}/status", "rb") as f:
+                    for line in f:
+                        if line.startswith(b"voluntary_ctxt_switches"):
+                            total += int(line.split()[1])
+                            break
+            except FileNotFoundError:
+                continue
+        return total
+
+    def sample(self):
+        now = time.monotonic()
+        proc = self.read_stat("/proc/self/stat")
+        result = {
+            "cpu_percent": 0.0,
+            "sampler_cpu_percent": 0.0,
+            "wakeups_per_sec": 0.0,
+            "rss": int(proc[21]) * self.PAGESIZE,
+            "threads": int(proc[17]),
+            "budget": self.budget,
+            "over_budget": False,
+        }
+        if self.last is not None and now - self.last[0] < self.MIN_WINDOW:
+            # Too short a window for CPU times counted in ticks, as after
+            # sample_now: the last rates are kept
+            result.update(self.rates)
+            result["over_budget"] = bool(
+                self.budget and result["cpu_percent"] > self.budget
+            )
+            return {"result": result, "debug": ""}
+        thread = self.read_stat("/proc/thread-self/stat")
+        current = {
+            "cpu": (int(proc[11]) + int(proc[12])) / self.CLK_TCK,
+            "sampler_cpu": (int(thread[11]) + int(thread[12])) / self.CLK_TCK,
+            "wakeups": self.read_wakeups(),
+        }
+        if self.last is not None:
+            elapsed = now - self.last[0]
+            for key in ("cpu", "sampler_cpu"):
+                used = current[key] - self.last[1][key]
+                result[f"{key}_percent"] = round(used / elapsed * 100, 2)
+            wakeups = current["wakeups"] - self.last[1]["wakeups"]
+            result["wakeups_per_sec"] = round(wakeups / elapsed, 1)
+        self.last = (now, current)
+        self.rates = {
+            key: result[key]
+            for key in ("cpu_percent", "sampler_cpu_percent", "wakeups_per_sec")
+        }
+        if self.budget and result["cpu_percent"] > self.budget:
+            result["over_budget"] = True
+            if now - self.last_alert >= self.ALERT_INTERVAL:
+                self.last_alert = now
+                decky_plugin.logger.warning(
+                    f"[DeckySpy][B]Plugin CPU {result['cpu_percent']}% exceeds "
+                    f"budget {self.budget}% of one core"
+                )
+        return {"result": result, "debug": ""}
+
+
+class StackSampler(threading.Thread):
+    # Statistical profiler: snapshots every thread's stack with
+    # sys._current_frames() and writes collapsed stacks (flamegraph.pl /
+    # speedscope input). Nothing runs unless a profile is requested.
+    def __init__(self, path, duration=10, interval=0.01):
+        super().__init__(name="DeckySpyProfiler", daemon=True)
+        self.path = path
+        self.duration = duration
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self.finished = threading.Event()
+
+    @staticmethod
+    def frame_label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def run(self):
+        me = threading.get_ident()
+        deadline = time.monotonic() + self.duration
+        while not self.finished.is_set() and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self.frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                stack = ";".join(reversed(labels))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+            self.finished.wait(self.interval)
+        with open(self.path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        self.finished.set()
+        decky_plugin.logger.info(
+            f"[DeckySpy][B]Profile of {self.samples} samples written to {self.path}"
+        )
+
+    def stop(self):
+        self.finished.set()
+
+
+class TraceRecorder:
+    # Gzipped JSON lines: a header, then one `[offset, sections]` line per cycle
+    # holding only the sections whose output changed since the previous cycle.
+    def __init__(self, path, interval=1, clock=SYSTEM_CLOCK):
+        import gzip
+
+        self.path = path
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self.start = clock.time()
+        self.last = {}
+        self.write_line(
+            {
+                "format": TRACE_FORMAT,
+                "version": TRACE_VERSION,
+                "start": self.start,
+                "interval": interval,
+            }
+        )
+
+    def write_line(self, obj):
+        line = json.dumps(obj, separators=(",", ":"), default=to_wire)
+        self.file.write(line + "\n")
+
+    def record(self, outputs):
+        with self.lock:
+            if self.file is None:
+                return
+            changed = {k: v for k, v in outputs.items() if self.last.get(k) != v}
+            self.last.update(changed)
+            self.write_line([round(self.clock.time() - self.start, 3), changed])
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_trace(path):
+    import gzip
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != TRACE_FORMAT:
+            raise ValueError(f"{path} is not a {TRACE_FORMAT} file")
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"unsupported trace version {header.get('version')}")
+        for line in f:
+            offset, changed = json.loads(line)
+            yield offset, changed
+
+
+class Histogram:
+    # Power-of-two nanosecond buckets from 1 us to ~68 s. Percentiles report
+    # the upper bound of the bucket they fall in, capped at the observed max.
+    FIRST_BIT = 10
+    BUCKETS = 27
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def record(self, ns):
+        index = min(max(ns.bit_length() - self.FIRST_BIT, 0), self.BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(1 << (index + self.FIRST_BIT), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum_ns": self.sum,
+            "p50_ns": self.percentile(0.5),
+            "p99_ns": self.percentile(0.99),
+            "max_ns": self.max,
+        }
+
+
+class Governor:
+    # Keeps the sampler thread's own CPU use within `budget` percent of one
+    # core by doubling the interval of whichever collector costs the most per
+    # second, and halving intervals again while there is room under budget.
+    WINDOW = 10
+    MAX_SCALE = 32
+
+    def __init__(self, keys, budget=0.5):
+        self.budget = budget
+        self.scales = {key: 1 for key in keys}
+        # CPU ns per collector run, smoothed
+        self.costs = {key: 0 for key in keys}
+        self.samples = deque()
+        self.usage = 0.0
+        self.last_change = None
+
+    def record_cost(self, key, ns):
+        previous = self.costs[key]
+        self.costs[key] = ns if not previous else (previous * 7 + ns) // 8
+
+    def cost_rate(self, key, interval):
+        # Percent of one core this collector uses at the given interval
+        return self.costs[key] / 1e9 / interval * 100
+
+    def update(self, now, cpu, intervals):
+        self.samples.append((now, cpu))
+        while now - self.samples[0][0] > self.WINDOW:
+            self.samples.popleft()
+        first, first_cpu = self.samples[0]
+        if now <= first:
+            return
+        self.usage = (cpu - first_cpu) / (now - first) * 100
+        if not self.budget or now - first < self.WINDOW / 2:
+            return
+        if self.last_change is not None and now - self.last_change < self.WINDOW:
+            return
+        if self.usage > self.budget:
+            keys = [k for k in self.scales if self.scales[k] < self.MAX_SCALE]
+            if not keys:
+                return
+            key = max(keys, key=lambda k: self.cost_rate(k, intervals[k]))
+            self.scales[key] *= 2
+        else:
+            keys = [k for k in self.scales if self.scales[k] > 1]
+            if not keys:
+                return
+            key = max(keys, key=lambda k: self.scales[k])
+            base = intervals[key] / self.scales[key]
+            extra = self.cost_rate(key, base * self.scales[key] / 2) - self.cost_rate(
+                key, intervals[key]
+            )
+            if self.usage + extra > self.budget / 2:
+                return
+            self.scales[key] //= 2
+        self.last_change = now
+        self.samples.clear()
+        self.samples.append((now, cpu))
+
+    def snapshot(self, intervals):
+        return {
+            "budget": self.budget,
+            "usage": round(self.usage, 3),
+            "intervals": intervals,
+            "scales": dict(self.scales),
+        }
+
+
+# How long a consumer's interest in a section lasts without renewal. Must
+# outlive the frontend's slowest refresh interval (60 s).
+LEASE_TTL = 120
+# Sections the backend keeps sampling while the setting enables an alert,
+# with the setting's default (matching DefaultSettings in the frontend)
+ALERT_SECTIONS = {
+    "oom.enabled": ("get-memory", True),
+    "battery.enabled": ("get-battery", True),
+    "overhead.budget": ("get-overhead", 0),
+}
+# Settings applied to a running sampler, by Sampler.set_budgets argument
+BUDGET_SETTINGS = {
+    "overhead.budget": "overhead_budget",
+    "sampler.cpu_budget": "cpu_budget",
+}
+
+
+class LeaseTable:
+    # Sections consumers currently want. Only leased or pinned sections are
+    # collected, so disabled and unused features cost nothing.
+    def __init__(self, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.expiry = {}
+        self.pinned = set()
+
+    def acquire(self, sections, ttl=LEASE_TTL):
+        # Returns the sections that were not being sampled until now
+        now = self.clock.monotonic()
+        with self.lock:
+            fresh = [
+                s
+                for s in sections
+                if self.expiry.get(s, 0) <= now and s not in self.pinned
+            ]
+            for section in sections:
+                self.expiry[section] = max(self.expiry.get(section, 0), now + ttl)
+        return fresh
+
+    def release(self, sections):
+        with self.lock:
+            for section in sections:
+                self.expiry.pop(section, None)
+
+    def pin(self, sections, pinned=True):
+        with self.lock:
+            if pinned:
+                self.pinned.update(sections)
+            else:
+                self.pinned.difference_update(sections)
+
+    def active(self):
+        now = self.clock.monotonic()
+        with self.lock:
+            live = {s for s, until in self.expiry.items() if until > now}
+            return live | self.pinned
+
+    def snapshot(self):
+        now = self.clock.monotonic()
+        with self.lock:
+            return {
+                "pinned": sorted(self.pinned),
+                "leases": {
+                    s: round(until - now, 1)
+                    for s, until in self.expiry.items()
+                    if until > now
+                },
+            }
+
+
+class Supervisor:
+    # Isolates collector failures: a failing collector's section keeps its
+    # last good result marked stale with the error, and the collector is
+    # retried with exponential backoff instead of on every tick.
+    MAX_BACKOFF = 300
+
+    def __init__(self, keys):
+        self.failures = {key: 0 for key in keys}
+        self.errors = {key: "" for key in keys}
+        self.last_good = {}
+
+    def run(self, key, collector):
+        try:
+            out = collector()
+        except Exception as e:
+            return self.fail(key, f"{type(e).__name__}: {e}", traceback.format_exc())
+        if self.failures[key]:
+            decky_plugin.logger.info(
+                f"[DeckySpy][B]Collector {key} recovered after "
+                f"{self.failures[key]} failures"
+            )
+            self.failures[key] = 0
+            self.errors[key] = ""
+        self.last_good[key] = out["result"]
+        return out
+
+    def fail(self, key, error, details=""):
+        self.failures[key] += 1
+        self.errors[key] = error
+        if self.failures[key] == 1:
+            decky_plugin.logger.error(
+                f"[DeckySpy][B]Collector {key} failed: {details or error}"
+            )
+        return {"result": self.last_good.get(key), "debug": error, "stale": True}
+
+    def delay(self, key, period, interval):
+        # Ticks until the next attempt of a failing collector
+        cap = max(int(self.MAX_BACKOFF / interval), period)
+        return min(period * 2 ** self.failures[key], cap)
+
+    def snapshot(self):
+        return {
+            key: {"failures": n, "error": self.errors[key]}
+            for key, n in self.failures.items()
+            if n
+        }
+
+
+# Collectors whose reads can stall (power_supply on a flaky dock, interface
+# enumeration during Wi-Fi reconnects) run on a worker pool and are given up
+# on after this many seconds
+COLLECTOR_DEADLINES = {"get-battery": 2, "get-net-interface": 2}
+COLLECTOR_WORKERS = 4
+# Collectors StatsThread runs on its own thread while the rest are in
+# flight on the pool: get-overhead measures the sampler thread itself, and
+# single procfs reads cost less than the handoff
+INLINE_COLLECTORS = {"get-overhead", "get-cpu", "get-memory"}
+
+PR_SET_TIMERSLACK = 29
+
+
+def set_timer_slack(ns):
+    # Allow the kernel to defer this thread's timer wakeups by up to `ns` so
+    # they coalesce with other wakeups on the system (Linux only)
+    import ctypes
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.prctl(PR_SET_TIMERSLACK, ctypes.c_ulong(ns), 0, 0, 0) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+# Scheduling policies a sampler thread can be moved to (Linux only)
+SCHED_POLICIES = {
+    name: getattr(os, "SCHED_" + name.upper())
+    for name in ("other", "batch", "idle")
+    if hasattr(os, "SCHED_" + name.upper())
+}
+
+
+def set_thread_scheduling(policy=None, nice=None, cpus=None):
+    # Lower the calling thread's claim on the CPU; policy, nice value and
+    # affinity are all per thread on Linux. Returns the effective settings,
+    # with anything that could not be applied under "errors".
+    tid = threading.get_native_id()
+    errors = []
+    try:
+        if policy is not None:
+            os.sched_setscheduler(0, SCHED_POLICIES[policy], os.sched_param(0))
+    except (KeyError, AttributeError, OSError) as e:
+        errors.append(f"policy {policy}: {e!r}")
+    try:
+        if nice is not None:
+            os.setpriority(os.PRIO_PROCESS, tid, nice)
+    except (AttributeError, OSError) as e:
+        errors.append(f"nice {nice}: {e!r}")
+    try:
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+    except (AttributeError, OSError) as e:
+        errors.append(f"cpus {cpus}: {e!r}")
+    state = {"tid": tid, "errors": errors}
+    try:
+        current = os.sched_getscheduler(0)
+        state["policy"] = next(
+            (k for k, v in SCHED_POLICIES.items() if v == current), current
+        )
+        state["nice"] = os.getpriority(os.PRIO_PROCESS, tid)
+        state["cpus"] = sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        pass
+    return state
+
+
+# Seconds of slack before the next tick needed to collect young garbage on
+# the sampler's schedule rather than wherever an allocation trips the
+# threshold
+GC_IDLE_MIN = 0.05
+
+
+class GcMonitor:
+    # Times every cyclic GC pass in the process through gc.callbacks
     def __init__(self):
-        super().__init__()
+        self.pauses = [Histogram() for _ in range(3)]
+        self.started = None
+
+    def install(self):
+        if self.callback not in gc.callbacks:
+            gc.callbacks.append(self.callback)
+
+    def uninstall(self):
+        if self.callback in gc.callbacks:
+            gc.callbacks.remove(self.callback)
+
+    def callback(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter_ns()
+        elif self.started is not None:
+            ns = time.perf_counter_ns() - self.started
+            self.pauses[info["generation"]].record(ns)
+            self.started = None
+
+    def snapshot(self):
+        return {
+            "frozen": gc.get_freeze_count(),
+            "counts": gc.get_count(),
+            "pauses": {f"gen{i}": h.summary() for i, h in enumerate(self.pauses)},
+        }
+
+
+GC_MONITOR = GcMonitor()
+
+
+# Sampling tick in seconds for each context: the Quick Access panel is open,
+# it is closed (or a game is running), or it is closed on battery power.
+SAMPLING_PROFILES = {"visible": 1, "background": 5, "battery": 30}
+# Sections sampled synchronously at startup, see Sampler.bootstrap
+BOOTSTRAP_COLLECTORS = ("get-cpu", "get-memory", "get-battery", "get-net-interface")
+
+
+class Sampler:
+    # Scheduling, supervision and publishing shared by StatsThread and
+    # AsyncSampler; subclasses only decide how collectors are run and waited on.
+    def __init__(self, clock=SYSTEM_CLOCK, collectors=None):
         self.interval = 1
         self.running = True
         self.output = {}
+        self.recorder = None
+        # Trace being replayed, see StatsThread
+        self.trace = None
+        self.on_publish = None
+        self.clock = clock
+        self.self_monitor = SelfMonitor()
+        if collectors is None:
+            collectors = {
+                "get-overhead": self.self_monitor.sample,
+                "get-cpu": DeckySpy.get_cpu,
+                "get-memory": DeckySpy.get_memory,
+                "get-battery": DeckySpy.get_battery,
+                "get-net-interface": DeckySpy.get_net_interface,
+            }
+        self.collectors = collectors
+        # Per-collector base intervals; collectors not listed use `interval`
+        self.intervals = {}
+        # Tick index at which each collector is next due
+        self.next_due = {key: 0 for key in collectors}
+        # Ticks sit on an absolute monotonic grid, epoch + tick * interval
+        self.epoch = None
+        self.tick = 0
+        # Seconds of timer slack the kernel may add to batch wakeups; 0 keeps
+        # the default
+        self.timer_slack = 0
+        # Requested policy/nice/cpus for the sampler and its workers, and
+        # what each thread actually got, by thread name
+        self.scheduling = {}
+        self.thread_scheduling = {}
+        # Set to cut the current wait short; `regrid` restarts the grid so
+        # every leased collector samples on the next step
+        self.wakeup = threading.Event()
+        self.regrid = False
+        self.governor = Governor(collectors)
+        self.supervisor = Supervisor(collectors)
+        self.deadlines = {
+            k: v for k, v in COLLECTOR_DEADLINES.items() if k in collectors
+        }
+        # Calls that missed their deadline and are still running
+        self.pending = {}
+        self.collector_cpu_ns = {key: 0 for key in collectors}
+        self.leases = LeaseTable(clock)
+        self.timings = {key: Histogram() for key in collectors}
+        self.loop_work = Histogram()
+        self.loop_jitter = Histogram()
+        self.cycles = 0
+        self.overruns = 0
+        # Net pymalloc blocks allocated from one cycle's start to the next,
+        # for recent cycles; zero in steady state
+        self.cycle_blocks = 0
+        self.block_deltas = deque(maxlen=60)
+        self.idle_collections = 0
+        # Hints from the frontend, see Plugin.set_sampling_context
+        self.context = {"visible": False, "game": False}
+        self.profiles = dict(SAMPLING_PROFILES)
+        self.profile = None
+        # Publish sequence numbers for long-polling consumers on `loop`
+        self.seq = 0
+        self.section_seq = {}
+        self.loop = None
+        self.changed = None
+
+    def begin_cycle(self):
+        start = self.clock.monotonic()
+        if self.epoch is None or self.regrid:
+            self.regrid = False
+            self.epoch = start
+            self.tick = 0
+            for key in self.next_due:
+                self.next_due[key] = 0
+        # How late this wakeup is against its deadline on the grid
+        deadline = self.epoch + self.tick * self.interval
+        self.loop_jitter.record(int(max(start - deadline, 0) * 1e9))
+        self.select_profile(start)
+        blocks = sys.getallocatedblocks()
+        if self.cycle_blocks:
+            self.block_deltas.append(blocks - self.cycle_blocks)
+        self.cycle_blocks = blocks
+        return start
+
+    def due(self, tick):
+        # Leased collectors due on this tick. A collector with a period of k
+        # ticks runs on multiples of k, so collectors with related periods
+        # fire on the same wakeup.
+        active = self.leases.active()
+        self.expire(active)
+        return [
+            (key, collector)
+            for key, collector in self.collectors.items()
+            if key in active and tick >= self.next_due[key]
+        ]
+
+    def expire(self, active):
+        # A section left without a lease keeps its last sample, marked stale
+        # so that it isn't served as current once asked for again
+        lapsed = {
+            key: dict(out, stale=True, debug="not sampled while unleased")
+            for key, out in self.output.items()
+            if key in self.collectors and key not in active and not out.get("stale")
+        }
+        if lapsed:
+            self.publish(lapsed)
+
+    def finish_call(self, key, tick):
+        if tick is None:
+            return
+        period = self.period(key)
+        if self.supervisor.failures[key]:
+            delay = self.supervisor.delay(key, period, self.interval)
+            self.next_due[key] = tick + delay
+        else:
+            self.next_due[key] = (tick // period + 1) * period
+
+    def finish_cycle(self, start, outputs):
+        # Publishes the cycle and returns how long to wait for the next tick
+        intervals = self.effective_intervals()
+        self.governor.update(start, self.cpu_seconds(), intervals)
+        governor = self.governor.snapshot(intervals)
+        governor["profile"] = self.profile
+        outputs["get-governor"] = {"result": governor, "debug": ""}
+        self.publish(outputs)
+        end = self.clock.monotonic()
+        self.loop_work.record(int((end - start) * 1e9))
+        self.cycles += 1
+        # Ticks whose deadline already passed are skipped rather than run
+        # back to back, so an overrun never accumulates into drift
+        upcoming = int((end - self.epoch) / self.interval) + 1
+        if upcoming > self.tick + 1:
+            self.overruns += 1
+        self.tick = max(self.tick + 1, upcoming)
+        self.collect_garbage(self.epoch + self.tick * self.interval - end)
+        return self.epoch + self.tick * self.interval - self.clock.monotonic()
+
+    def collect_garbage(self, idle):
+        # Young generations are collected here, right after a publish with
+        # time to spare, once they are half way to their automatic threshold
+        if idle < GC_IDLE_MIN:
+            return
+        count0, count1, _ = gc.get_count()
+        threshold0, threshold1, _ = gc.get_threshold()
+        if threshold0 and count0 >= threshold0 // 2:
+            gc.collect(1 if count1 >= threshold1 // 2 else 0)
+            self.idle_collections += 1
+
+    def cpu_seconds(self):
+        return sum(self.collector_cpu_ns.values()) / 1e9
+
+    def select_profile(self, now):
+        if self.profiles is None:
+            return
+        out = self.output.get("get-battery")
+        battery = None if out is None or out.get("restored") else out["result"]
+        on_battery = battery is not None and battery.battery and not battery.plugged
+        if self.context["visible"]:
+            profile = "visible"
+        elif on_battery and not self.context["game"]:
+            profile = "battery"
+        else:
+            profile = "background"
+        if profile == self.profile:
+            return
+        self.profile = profile
+        self.interval = self.profiles[profile]
+        # Start a new grid at the new pace with every collector due now
+        self.epoch = now
+        self.tick = 0
+        for key in self.next_due:
+            self.next_due[key] = 0
+
+    def configure(
+        self,
+        overhead_budget=0,
+        cpu_budget=0.5,
+        timer_slack=0,
+        scheduling=None,
+        pins=(),
+    ):
+        # Startup settings; `pins` are (section, pinned) pairs
+        self.self_monitor.budget = overhead_budget
+        self.governor.budget = cpu_budget
+        self.timer_slack = timer_slack
+        self.scheduling = dict(scheduling or {})
+        for section, pinned in pins:
+            self.leases.pin((section,), pinned)
+
+    def set_budgets(self, overhead_budget=None, cpu_budget=None):
+        # Budgets changed in the settings while running
+        if overhead_budget is not None:
+            self.self_monitor.budget = overhead_budget
+        if cpu_budget is not None:
+            self.governor.budget = cpu_budget
+
+    def restore(self, sections):
+        # Serve sections saved by an earlier session until they are sampled
+        # again; they never replace a live section
+        self.publish({k: v for k, v in sections.items() if k not in self.output})
+
+    def bootstrap(self):
+        # A first sample taken synchronously before the sampler starts, so
+        # RPCs have data at once. Collectors with a deadline may block and
+        # are left to the first cycle. Marked so that the first lease of a
+        # section has the sampler replace it right away.
+        outputs = {
+            key: dict(self.run_collector(key, self.collectors[key]), bootstrap=True)
+            for key in BOOTSTRAP_COLLECTORS
+            if key in self.collectors and key not in self.deadlines
+        }
+        self.publish(outputs)
+        return outputs
+
+    def set_context(self, **hints):
+        self.context.update(hints)
+        self.wake()
+
+    def wake(self):
+        # Sample now and start a fresh grid, e.g. after a reconfiguration
+        self.regrid = True
+        self.wakeup.set()
+
+    def reconfigure(self, interval=None, intervals=None):
+        # A fixed tick replaces the context profiles; None restores them
+        if interval is None:
+            self.profiles = dict(SAMPLING_PROFILES)
+            self.profile = None
+        else:
+            self.profiles = None
+            self.interval = interval
+        if intervals is not None:
+            self.intervals = dict(intervals)
+        self.wake()
+
+    def period(self, key):
+        # Collector period in whole ticks
+        base = round(self.intervals.get(key, self.interval) / self.interval)
+        return max(base, 1) * self.governor.scales[key]
+
+    def effective_intervals(self):
+        return {key: self.period(key) * self.interval for key in self.collectors}
+
+    def apply_scheduling(self):
+        # Runs on the sampler thread and on each worker as it starts
+        state = set_thread_scheduling(**self.scheduling)
+        if state["errors"]:
+            decky_plugin.logger.warning(
+                f"[DeckySpy][B]Scheduling not applied: {'; '.join(state['errors'])}"
+            )
+        self.thread_scheduling[threading.current_thread().name] = state
+
+    def run_collector(self, key, collector):
+        # Runs on the sampler thread or a worker and accounts the time and
+        # CPU it used
+        begin = time.thread_time_ns()
+        begin_wall = time.perf_counter_ns()
+        out = self.supervisor.run(key, collector)
+        self.timings[key].record(time.perf_counter_ns() - begin_wall)
+        cost = time.thread_time_ns() - begin
+        self.governor.record_cost(key, cost)
+        self.collector_cpu_ns[key] += cost
+        return out
+
+    def top_k_mem_procs(self, k):
+        # The process scan behind get_top_k_mem_procs, made where the
+        # sampler runs
+        return DeckySpy.get_top_k_mem_procs(k)
+
+    def metrics(self):
+        return {
+            "mode": type(self).__name__,
+            "interval": self.interval,
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "leases": self.leases.snapshot(),
+            "scheduling": dict(self.thread_scheduling),
+            "failing": self.supervisor.snapshot(),
+            "collectors": {k: v.summary() for k, v in self.timings.items()},
+            "loop": {
+                "work": self.loop_work.summary(),
+                "jitter": self.loop_jitter.summary(),
+            },
+            "gc": dict(
+                GC_MONITOR.snapshot(),
+                idle_collections=self.idle_collections,
+                allocated_blocks={
+                    "last": self.block_deltas[-1] if self.block_deltas else 0,
+                    "mean": (
+                        sum(self.block_deltas) / len(self.block_deltas)
+                        if self.block_deltas
+                        else 0
+                    ),
+                    "max": max(self.block_deltas, default=0),
+                },
+            ),
+        }
+
+    def publish(self, outputs):
+        self.output.update(outputs)
+        self.seq += 1
+        for key in outputs:
+            self.section_seq[key] = self.seq
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(outputs)
+        if self.on_publish is not None:
+            self.on_publish(outputs)
+        if self.loop is not None:
+            self.notify()
+
+    def attach(self, loop):
+        # Let coroutines on `loop` await new samples with wait_for_update
+        self.loop = loop
+        self.changed = loop.create_future()
+
+    def notify(self):
+        # Sampler thread -> event loop handoff
+        self.loop.call_soon_threadsafe(self.resolve_changed)
+
+    def resolve_changed(self):
+        changed, self.changed = self.changed, self.loop.create_future()
+        changed.set_result(self.seq)
+
+    async def wait_for_update(self, section, after=0, timeout=None):
+        # Sequence number of the first publish of `section` newer than
+        # `after`, or the current one if `timeout` passes first
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.section_seq.get(section, 0) <= after:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(asyncio.shield(self.changed), remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.section_seq.get(section, 0)
+
+    def start_recording(self, path):
+        self.stop_recording()
+        self.recorder = TraceRecorder(path, self.interval, self.clock)
+
+    def stop_recording(self):
+        # Path of the finished trace, or None if nothing was recording
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return None
+        recorder.close()
+        return recorder.path
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        self.stop_recording()
+
+
+class StatsThread(Sampler, threading.Thread):
+    def __init__(self, trace=None, speed=1.0, clock=SYSTEM_CLOCK, collectors=None):
+        threading.Thread.__init__(self, name="DeckySpySampler")
+        Sampler.__init__(self, clock, collectors)
+        self.pool = None
+        # Off, only collectors with a deadline leave the sampler thread
+        self.parallel = True
+        # Replay mode: feed a recorded trace through `publish` instead of
+        # sampling the host. A speed of 0 replays as fast as possible.
+        self.trace = trace
+        self.speed = speed
 
     def run(self):
+        if self.trace is not None:
+            self.replay()
+            return
+        if self.timer_slack:
+            set_timer_slack(int(self.timer_slack * 1e9))
+        self.apply_scheduling()
+        while self.running:
+            try:
+                self.step()
+            except Exception:
+                # Collectors are supervised; this only guards the loop itself
+                decky_plugin.logger.error(
+                    f"[DeckySpy][B]Sampler cycle failed: {traceback.format_exc()}"
+                )
+                self.clock.wait(self.wakeup, self.interval)
+                self.wakeup.clear()
+        # Shut down here rather than in stop() so a cycle in progress can
+        # still submit; calls stuck past their deadline are abandoned
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def step(self):
+        start = self.begin_cycle()
+        outputs = self.collect(self.tick)
+        if self.clock.wait(self.wakeup, self.finish_cycle(start, outputs)):
+            self.wakeup.clear()
+
+    def collect(self, tick=None):
+        # With `tick`, only the collectors due on that tick run. They run
+        # concurrently on the pool, so a cycle takes as long as its slowest
+        # collector (or deadline) rather than the sum of them.
+        due = list(self.collectors.items() if tick is None else self.due(tick))
+        start = time.monotonic()
+        futures = {
+            key: self.submit(key, collector)
+            for key, collector in due
+            if key in self.deadlines or self.parallel and key not in INLINE_COLLECTORS
+        }
+        outputs = {}
+        for key, collector in due:
+            if key in futures:
+                outputs[key] = self.result(key, futures[key], start)
+            else:
+                outputs[key] = self.run_collector(key, collector)
+            self.finish_call(key, tick)
+        return outputs
+
+    def cpu_seconds(self):
+        # The sampler thread itself plus what its workers spent
+        workers = sum(
+            cost
+            for key, cost in self.collector_cpu_ns.items()
+            if key in self.deadlines or self.parallel and key not in INLINE_COLLECTORS
+        )
+        return time.thread_time() + workers / 1e9
+
+    def submit(self, key, collector):
+        future = self.pending.pop(key, None)
+        if future is not None and not future.done():
+            # Still stuck from an earlier tick; don't pile up another call
+            self.pending[key] = future
+            return None
+        if future is None:
+            if self.pool is None:
+                self.pool = concurrent.futures.ThreadPoolExecutor(
+                    COLLECTOR_WORKERS,
+                    thread_name_prefix="DeckySpyCollector",
+                    initializer=self.apply_scheduling,
+                )
+            future = self.pool.submit(self.run_collector, key, collector)
+        return future
+
+    def result(self, key, future, start):
+        # Collectors without a deadline are waited on for as long as they take
+        deadline = self.deadlines.get(key)
+        if future is None:
+            return self.supervisor.fail(key, f"blocked for over {deadline}s")
+        timeout = None
+        if deadline is not None:
+            timeout = max(start + deadline - time.monotonic(), 0)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.pending[key] = future
+            return self.supervisor.fail(key, f"timed out after {deadline}s")
+
+    def replay(self, until=None):
+        start = self.clock.monotonic()
+        for offset, changed in read_trace(self.trace):
+            if not self.running:
+                return
+            if self.speed > 0:
+                due = start + offset / self.speed
+                if until is not None and due > until:
+                    return
+                # Only stop() ends the wait early: a wake() from an RPC or a
+                # context change must not move the trace forward
+                while self.running and self.clock.monotonic() < due:
+                    if self.clock.wait(self.wakeup, due - self.clock.monotonic()):
+                        self.wakeup.clear()
+                if not self.running:
+                    return
+            self.publish(changed)
+
+    async def shutdown(self, timeout):
+        self.stop()
+        await asyncio.to_thread(self.join, timeout)
+        return not self.is_alive()
+
+
+class AsyncSampler(Sampler):
+    # The sampler as a task on the plugin's event loop: blocking reads run on
+    # a dedicated executor and results reach awaiting consumers without a
+    # cross-thread handoff.
+    def __init__(self, clock=SYSTEM_CLOCK, collectors=None):
+        super().__init__(clock, collectors)
+        # One spare worker so a read stuck past its deadline doesn't block
+        # the others. Scheduling settings apply to these workers only, never
+        # to the loop's own thread.
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            COLLECTOR_WORKERS + 1,
+            thread_name_prefix="DeckySpySampler",
+            initializer=self.apply_scheduling,
+        )
+        self.task = None
+        self.async_wakeup = None
+
+    # Run on the loop's thread rather than the executor: SelfMonitor reads
+    # /proc/thread-self, and the loop's thread is the one this sampler runs on
+    ON_LOOP = {"get-overhead"}
+
+    def start(self):
+        self.attach(asyncio.get_running_loop())
+        self.async_wakeup = asyncio.Event()
+        self.task = self.loop.create_task(self.run())
+
+    def is_alive(self):
+        return self.task is not None and not self.task.done()
+
+    async def run(self):
+        while self.running:
+            try:
+                start = self.begin_cycle()
+                due = self.due(self.tick)
+                results = await asyncio.gather(
+                    *(self.call(key, collector) for key, collector in due)
+                )
+                outputs = {}
+                for (key, _), out in zip(due, results):
+                    outputs[key] = out
+                    self.finish_call(key, self.tick)
+                timeout = self.finish_cycle(start, outputs)
+            except Exception:
+                decky_plugin.logger.error(
+                    f"[DeckySpy][B]Sampler cycle failed: {traceback.format_exc()}"
+                )
+                timeout = self.interval
+            try:
+                await asyncio.wait_for(self.async_wakeup.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+            self.async_wakeup.clear()
+            self.wakeup.clear()
+
+    async def call(self, key, collector):
+        if key in self.ON_LOOP:
+            return self.run_collector(key, collector)
+        deadline = self.deadlines.get(key)
+        future = self.pending.pop(key, None)
+        if future is not None and not future.done():
+            self.pending[key] = future
+            return self.supervisor.fail(key, f"blocked for over {deadline}s")
+        if future is None:
+            future = self.loop.run_in_executor(
+                self.executor, self.run_collector, key, collector
+            )
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), deadline)
+        except asyncio.TimeoutError:
+            self.pending[key] = future
+            return self.supervisor.fail(key, f"timed out after {deadline}s")
+
+    def notify(self):
+        # Already on the loop
+        self.resolve_changed()
+
+    def wake(self):
+        super().wake()
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.async_wakeup.set)
+
+    def stop(self):
+        super().stop()
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.async_wakeup.set)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def shutdown(self, timeout):
+        self.stop()
+        if self.task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(self.task), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return not self.is_alive()
+
+
+class SharedSnapshot:
+    # The sampler's output in a shared mapping, guarded by a seqlock. The
+    # single writer makes `seq` odd while it writes and even when done;
+    # readers unpack in place and retry until `seq` is the same even value
+    # before and after. CPU, memory and battery have fixed slots; the other
+    # sections, and any carrying an error, go in a JSON blob after them.
+    SIZE = 64 * 1024
+    SEQ = struct.Struct("<Q")
+    # publishes, time, blob length
+    HEADER = struct.Struct("<QdI")
+    # flags, cpu, vmem total/used/percent, swap total/used/percent,
+    # battery present/plugged (-1 unknown)/percent/secsleft
+    FIXED = struct.Struct("<BdQQdQQdBbdq")
+    CPU, MEMORY, BATTERY = 1, 2, 4
+    BLOB = SEQ.size + HEADER.size + FIXED.size
+    READ_RETRIES = 1000
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.view = memoryview(buf)
+        self.cached_seq = None
+        self.cached = {}
+
+    def write(self, output, now):
+        fixed = {
+            key: output[key]
+            for key in ("get-cpu", "get-memory", "get-battery")
+            if key in output
+            and set(output[key]) == {"result", "debug"}
+            and not output[key]["debug"]
+        }
+        flags = 0
+        cpu = 0.0
+        vmem = swap = {"total": 0, "used": 0, "percent": 0.0}
+        battery = {"battery": False, "plugged": None, "percent": -1, "secsleft": -1}
+        if "get-cpu" in fixed:
+            flags |= self.CPU
+            cpu = fixed["get-cpu"]["result"]
+        if "get-memory" in fixed:
+            flags |= self.MEMORY
+            vmem, swap = fixed["get-memory"]["result"].wire().values()
+        if "get-battery" in fixed:
+            flags |= self.BATTERY
+            battery = fixed["get-battery"]["result"].wire()
+        plugged = -1 if battery["plugged"] is None else int(battery["plugged"])
+        blob = json.dumps(
+            {k: v for k, v in output.items() if k not in fixed}, default=to_wire
+        ).encode()
+        if len(blob) > self.SIZE - self.BLOB:
+            decky_plugin.logger.warning(
+                f"[DeckySpy][B]Snapshot blob of {len(blob)} bytes dropped"
+            )
+            blob = b"{}"
+        (seq,) = self.SEQ.unpack_from(self.buf, 0)
+        publishes, _, _ = self.HEADER.unpack_from(self.buf, self.SEQ.size)
+        # Odd while writing, even if a dead writer left it odd
+        seq = (seq + 1) | 1
+        self.SEQ.pack_into(self.buf, 0, seq)
+        self.HEADER.pack_into(self.buf, self.SEQ.size, publishes + 1, now, len(blob))
+        self.FIXED.pack_into(
+            self.buf,
+            self.SEQ.size + self.HEADER.size,
+            flags,
+            cpu,
+            vmem["total"],
+            vmem["used"],
+            vmem["percent"],
+            swap["total"],
+            swap["used"],
+            swap["percent"],
+            battery["battery"],
+            plugged,
+            battery["percent"],
+            battery["secsleft"],
+        )
+        self.view[self.BLOB : self.BLOB + len(blob)] = blob
+        self.SEQ.pack_into(self.buf, 0, seq + 1)
+
+    def publishes(self):
+        return self.HEADER.unpack_from(self.buf, self.SEQ.size)[0]
+
+    def read(self):
+        # Decoding is skipped while nothing new was published. A writer that
+        # died mid-write leaves `seq` odd; the last good read is served then.
+        for _ in range(self.READ_RETRIES):
+            (seq,) = self.SEQ.unpack_from(self.buf, 0)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if seq == self.cached_seq:
+                return self.cached
+            _, _, length = self.HEADER.unpack_from(self.buf, self.SEQ.size)
+            fixed = self.FIXED.unpack_from(self.buf, self.SEQ.size + self.HEADER.size)
+            blob = bytes(self.view[self.BLOB : self.BLOB + length])
+            if self.SEQ.unpack_from(self.buf, 0)[0] == seq:
+                break
+        else:
+            return self.cached
+        output = json.loads(blob) if length else {}
+        flags, cpu = fixed[:2]
+        if flags & self.CPU:
+            output["get-cpu"] = {"result": cpu, "debug": ""}
+        if flags & self.MEMORY:
+            output["get-memory"] = {
+                "result": {
+                    "vmem": dict(zip(("total", "used", "percent"), fixed[2:5])),
+                    "swap": dict(zip(("total", "used", "percent"), fixed[5:8])),
+                },
+                "debug": "",
+            }
+        if flags & self.BATTERY:
+            present, plugged, percent, secsleft = fixed[8:]
+            if percent.is_integer():
+                percent = int(percent)
+            output["get-battery"] = {
+                "result": {
+                    "battery": bool(present),
+                    "percent": percent,
+                    "secsleft": secsleft,
+                    "plugged": None if plugged < 0 else bool(plugged),
+                },
+                "debug": "",
+            }
+        self.cached_seq, self.cached = seq, output
+        return output
+
+
+# Sampler methods a ProcessSampler may call in its worker
+WORKER_CALLS = {
+    "configure",
+    "set_budgets",
+    "set_context",
+    "wake",
+    "reconfigure",
+    "metrics",
+    "top_k_mem_procs",
+    "start_recording",
+    "stop_recording",
+    "stop",
+}
+WORKER_LEASE_CALLS = {"acquire", "release", "pin"}
+
+
+def run_sampler_worker(buf, conn, config, seed, inherited=()):
+    # Entry point of the forked worker: a StatsThread run on the process's
+    # only thread, publishing into `buf`, steered over `conn`. The plugin's
+    # end of the pipe is closed so the worker sees EOF when the plugin dies.
+    for other in inherited:
+        other.close()
+    sampler = StatsThread()
+    sampler.configure(**config)
+    sampler.output.update(seed)
+    snapshot = SharedSnapshot(buf)
+    sampler.on_publish = lambda outputs: snapshot.write(sampler.output, time.time())
+
+    def serve():
+        while True:
+            try:
+                request, method, args, kwargs, reply = conn.recv()
+            except (EOFError, OSError):
+                # The plugin is gone
+                sampler.stop()
+                return
+            if method in WORKER_LEASE_CALLS:
+                result = getattr(sampler.leases, method)(*args, **kwargs)
+            elif method in WORKER_CALLS:
+                result = getattr(sampler, method)(*args, **kwargs)
+            else:
+                result = None
+            if reply:
+                try:
+                    conn.send((request, result))
+                except (EOFError, OSError):
+                    sampler.stop()
+                    return
+
+    threading.Thread(target=serve, name="DeckySpyControl", daemon=True).start()
+    # What came over from the plugin's process is never garbage here
+    gc.freeze()
+    sampler.run()
+
+
+class ForwardingLeaseTable(LeaseTable):
+    # The plugin-side copy of a ProcessSampler's leases. Renewals are only
+    # forwarded once a lease is half spent, so polling RPCs rarely cross the
+    # process boundary.
+    def __init__(self, send, clock=SYSTEM_CLOCK):
+        super().__init__(clock)
+        self.send = send
+
+    def acquire(self, sections, ttl=LEASE_TTL):
+        renew_before = self.clock.monotonic() + ttl / 2
+        with self.lock:
+            stale = [s for s in sections if self.expiry.get(s, 0) < renew_before]
+        fresh = super().acquire(sections, ttl)
+        if stale:
+            self.send("acquire", stale, ttl)
+        return fresh
+
+    def release(self, sections):
+        super().release(sections)
+        self.send("release", sections)
+
+    def pin(self, sections, pinned=True):
+        super().pin(sections, pinned)
+        self.send("pin", sections, pinned)
+
+
+class ProcessSampler:
+    # The sampler in a forked child process, so scan cost never holds this
+    # process's GIL. The child publishes into a SharedSnapshot that RPCs read
+    # lock-free, and is restarted with backoff if it dies.
+    MAX_BACKOFF = 60
+    REPLY_TIMEOUT = 1
+    # A full process scan takes longer than a control call
+    SCAN_TIMEOUT = 5
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, config):
+        import mmap
+
+        self.config = config
+        # An anonymous shared mapping inherited over fork: no named segment to
+        # clean up and no resource tracker process
+        self.buf = mmap.mmap(-1, SharedSnapshot.SIZE)
+        self.snapshot = SharedSnapshot(self.buf)
+        self.leases = ForwardingLeaseTable(self.send)
+        # The worker pins these itself; mirrored here so that a restarted one
+        # is configured with the current pins rather than the startup ones
+        for section, pinned in config.get("pins", ()):
+            LeaseTable.pin(self.leases, (section,), pinned)
+        self.context = {"visible": False, "game": False}
+        self.trace = None
+        # Sections published before the worker first starts
+        self.seed = {}
+        # Last calls that change the schedule, replayed to a restarted worker
+        self.replay_calls = {}
+        self.lock = threading.Lock()
+        # Held from a request to its reply, apart from `lock` so that calls
+        # without one are never held up behind a slow worker
+        self.reply_lock = threading.Lock()
+        self.requests = 0
+        self.running = True
+        self.stopped = threading.Event()
+        self.process = None
+        self.conn = None
+        self.restarts = 0
+        self.watchdog = None
+
+    @property
+    def output(self):
+        return self.snapshot.read()
+
+    def restore(self, sections):
+        self.seed.update({k: v for k, v in sections.items() if k not in self.seed})
+        self.snapshot.write(self.seed, time.time())
+
+    def bootstrap(self):
+        # Sampled here, in the plugin's process, before the worker exists
+        outputs = Sampler().bootstrap()
+        self.seed.update(outputs)
+        self.snapshot.write(self.seed, time.time())
+        return outputs
+
+    def start(self):
+        self.spawn()
+        self.watchdog = threading.Thread(
+            target=self.watch, name="DeckySpyWatchdog", daemon=True
+        )
+        self.watchdog.start()
+
+    def spawn(self):
+        # Fork rather than spawn: the loader may be a frozen binary that can't
+        # be re-executed as a Python interpreter
+        import multiprocessing
+
+        context = multiprocessing.get_context("fork")
+        pins = self.leases.snapshot()
+        config = dict(
+            self.config,
+            pins=[
+                (section, section in pins["pinned"])
+                for section, _ in self.config.get("pins", ())
+            ],
+        )
+        conn, child = context.Pipe()
+        process = context.Process(
+            target=run_sampler_worker,
+            args=(self.buf, child, config, self.seed, (conn,)),
+            name="DeckySpySampler",
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        with self.lock:
+            self.process, self.conn = process, conn
+        self.send("pin", pins["pinned"])
+        for section, remaining in pins["leases"].items():
+            self.send("acquire", (section,), remaining)
+        self.send("set_context", **self.context)
+        for method, (args, kwargs) in self.replay_calls.items():
+            self.send(method, *args, **kwargs)
+
+    def watch(self):
+        import multiprocessing.connection
+
+        delay = 1
         while self.running:
-            result = DeckySpy.get_cpu()
-            self.output["get-cpu"] = result
-            result = DeckySpy.get_memory()
-            self.output["get-memory"] = result
-            result = DeckySpy.get_battery()
-            self.output["get-battery"] = result
-            result = DeckySpy.get_net_interface()
-            self.output["get-net-interface"] = result
-            time.sleep(self.interval)
+            started = time.monotonic()
+            multiprocessing.connection.wait([self.process.sentinel])
+            if not self.running:
+                return
+            self.process.join()
+            decky_plugin.logger.warning(
+                f"[DeckySpy][B]Sampler worker exited with {self.process.exitcode}, "
+                f"restarting in {delay}s"
+            )
+            if time.monotonic() - started > self.MAX_BACKOFF:
+                delay = 1
+            if self.stopped.wait(delay):
+                return
+            delay = min(delay * 2, self.MAX_BACKOFF)
+            self.restarts += 1
+            self.spawn()
+
+    def send(self, method, *args, reply=False, **kwargs):
+        # With `reply`, waits up to REPLY_TIMEOUT (or `reply` seconds) for the
+        # worker's answer: call it off the loop. The worker answers in order,
+        # so such calls take turns from request to reply; anything else read
+        # is a late reply to a call that timed out.
+        if not reply:
+            self.post(method, args, kwargs, False)
+            return None
+        timeout = self.REPLY_TIMEOUT if reply is True else reply
+        with self.reply_lock:
+            sent = self.post(method, args, kwargs, True)
+            if sent is None:
+                return None
+            conn, request = sent
+            deadline = time.monotonic() + timeout
+            try:
+                while conn.poll(max(deadline - time.monotonic(), 0)):
+                    answered, result = conn.recv()
+                    if answered == request:
+                        return result
+            except (EOFError, OSError):
+                pass
+        return None
+
+    def post(self, method, args, kwargs, reply):
+        # The pipe and request id a request went out with, None if it didn't
+        with self.lock:
+            if self.conn is None:
+                return None
+            self.requests += 1
+            try:
+                self.conn.send((self.requests, method, args, kwargs, reply))
+            except (EOFError, OSError):
+                return None
+            return self.conn, self.requests
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def set_context(self, **hints):
+        self.context.update(hints)
+        self.send("set_context", **hints)
+
+    def wake(self):
+        self.send("wake")
+
+    def set_budgets(self, overhead_budget=None, cpu_budget=None):
+        # Kept in the config a restarted worker is configured with
+        if overhead_budget is not None:
+            self.config["overhead_budget"] = overhead_budget
+        if cpu_budget is not None:
+            self.config["cpu_budget"] = cpu_budget
+        self.send("set_budgets", overhead_budget, cpu_budget)
+
+    def reconfigure(self, interval=None, intervals=None):
+        self.replay_calls["reconfigure"] = ((interval, intervals), {})
+        self.send("reconfigure", interval, intervals)
+
+    def top_k_mem_procs(self, k):
+        out = self.send("top_k_mem_procs", k, reply=self.SCAN_TIMEOUT)
+        if out is None:
+            return {"result": [], "debug": "Sampler worker did not answer"}
+        return out
+
+    def metrics(self):
+        metrics = self.send("metrics", reply=True) or {}
+        metrics["mode"] = type(self).__name__
+        metrics["worker"] = {
+            "pid": self.process.pid if self.process is not None else None,
+            "alive": self.is_alive(),
+            "restarts": self.restarts,
+        }
+        return metrics
+
+    def attach(self, loop):
+        pass
+
+    async def wait_for_update(self, section, after=0, timeout=None):
+        # Publishes are counted for the snapshot as a whole, and noticed by
+        # polling it
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            seq = self.snapshot.publishes()
+            if seq > after and section in self.output:
+                return seq
+            if deadline is not None and time.monotonic() >= deadline:
+                return seq
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+    def start_recording(self, path):
+        self.send("start_recording", path)
+
+    def stop_recording(self):
+        return self.send("stop_recording", reply=True)
 
     def stop(self):
         self.running = False
+        self.stopped.set()
+        self.send("stop")
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    async def shutdown(self, timeout):
+        self.stop()
+        if self.process is not None:
+            await asyncio.to_thread(self.process.join, timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                await asyncio.to_thread(self.process.join, timeout)
+        return not self.is_alive()
+
+
+class RpcMetrics:
+    SUMMARY_INTERVAL = 60
+
+    def __init__(self):
+        self.methods = {}
+        self.inflight = 0
+        self.max_inflight = 0
+        self.last_summary = time.monotonic()
+        self.last_counts = {}
+
+    def method(self, name):
+        stats = self.methods.get(name)
+        if stats is None:
+            stats = self.methods[name] = {
+                "count": 0,
+                "errors": 0,
+                "inflight": 0,
+                "latency": Histogram(),
+                "bytes": 0,
+                "max_bytes": 0,
+            }
+        return stats
+
+    def record(self, stats, ns, payload):
+        stats["latency"].record(ns)
+        stats["count"] += 1
+        # Sized as sent: the JSON strings sections are returned as. Anything
+        # else is small, and not worth encoding again to measure.
+        data = payload.get("data") if isinstance(payload, dict) else None
+        if not isinstance(data, str):
+            return
+        size = len(data.encode())
+        stats["bytes"] += size
+        if size > stats["max_bytes"]:
+            stats["max_bytes"] = size
+
+    def snapshot(self):
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "methods": {
+                name: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "inflight": stats["inflight"],
+                    "bytes": stats["bytes"],
+                    "max_bytes": stats["max_bytes"],
+                    "latency": stats["latency"].summary(),
+                }
+                for name, stats in self.methods.items()
+            },
+        }
+
+    def summary_due(self):
+        return time.monotonic() - self.last_summary >= self.SUMMARY_INTERVAL
+
+    def summary(self):
+        # One compact line covering the calls made since the previous summary
+        now = time.monotonic()
+        window = now - self.last_summary
+        parts = []
+        for name, stats in sorted(self.methods.items()):
+            calls = stats["count"] - self.last_counts.get(name, 0)
+            self.last_counts[name] = stats["count"]
+            if not calls:
+                continue
+            latency = stats["latency"]
+            parts.append(
+                f"{name} n={calls} p50={latency.percentile(0.5) / 1e6:.2f}ms"
+                f" p99={latency.percentile(0.99) / 1e6:.2f}ms"
+                f" avg_bytes={stats['bytes'] // max(stats['count'], 1)}"
+            )
+        self.last_summary = now
+        return f"rpc {window:.0f}s max_inflight={self.max_inflight}: " + "; ".join(
+            parts
+        )
+
+
+RPC_METRICS = RpcMetrics()
+# Set while an RPC is running so that calls it makes into other Plugin
+# methods (log_py -> get_settings, get_cpu -> thread_output) are not counted
+_rpc_active = contextvars.ContextVar("rpc_active", default=False)
+
+
+def rpc_metric(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if _rpc_active.get():
+            return await func(*args, **kwargs)
+        token = _rpc_active.set(True)
+        stats = RPC_METRICS.method(name)
+        stats["inflight"] += 1
+        RPC_METRICS.inflight += 1
+        if RPC_METRICS.inflight > RPC_METRICS.max_inflight:
+            RPC_METRICS.max_inflight = RPC_METRICS.inflight
+        start = time.perf_counter_ns()
+        payload = None
+        try:
+            payload = await func(*args, **kwargs)
+            return payload
+        except BaseException:
+            stats["errors"] += 1
+            raise
+        finally:
+            RPC_METRICS.record(stats, time.perf_counter_ns() - start, payload)
+            stats["inflight"] -= 1
+            RPC_METRICS.inflight -= 1
+            _rpc_active.reset(token)
+            if RPC_METRICS.summary_due():
+                decky_plugin.logger.info("[DeckySpy][B]" + RPC_METRICS.summary())
+
+    return wrapper
+
+
+def uncounted(func):
+    # For the loader's hooks: the RPC methods they call are not frontend
+    # calls
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _rpc_active.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _rpc_active.reset(token)
+
+    return wrapper
+
+
+def instrument_rpcs(cls):
+    # Wrap every public coroutine the frontend can call with rpc_metric
+    for name, func in list(vars(cls).items()):
+        if not inspect.iscoroutinefunction(func):
+            continue
+        if name in ("_main", "_unload"):
+            setattr(cls, name, uncounted(func))
+        elif not name.startswith("_"):
+            setattr(cls, name, rpc_metric(func))
+    return cls
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one computation on the
+    # default executor, and its result is reused for `ttl` seconds, so a
+    # burst of identical RPCs costs one scan.
+    def __init__(self, ttl=1, clock=SYSTEM_CLOCK):
+        self.ttl = ttl
+        self.clock = clock
+        self.inflight = {}
+        self.memo = {}
+        self.runs = 0
+        self.shared = 0
+        self.hits = 0
+
+    async def run(self, key, func, *args):
+        memo = self.memo.get(key)
+        if memo is not None and memo[0] > self.clock.monotonic():
+            self.hits += 1
+            return memo[1]
+        future = self.inflight.get(key)
+        if future is None:
+            self.runs += 1
+            future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+            self.inflight[key] = future
+            future.add_done_callback(functools.partial(self.done, key))
+        else:
+            self.shared += 1
+        # A cancelled caller must not cancel the scan others are waiting on
+        return await asyncio.shield(future)
+
+    def done(self, key, future):
+        del self.inflight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        now = self.clock.monotonic()
+        self.memo = {k: v for k, v in self.memo.items() if v[0] > now}
+        self.memo[key] = (now + self.ttl, future.result())
+
+    def snapshot(self):
+        return {"runs": self.runs, "shared": self.shared, "hits": self.hits}
+
+
+# Seconds a process scan result is reused for
+SCAN_TTL = 1
+
+
+def simulate(duration, interval=1, collectors=None, trace=None, on_publish=None):
+    # Drive a StatsThread on the calling thread under a VirtualClock, e.g.
+    # simulate(86400, collectors=...) runs a day of 1 Hz sampling in seconds.
+    # An interval of None keeps the context-adaptive sampling profiles.
+    clock = VirtualClock()
+    sampler = StatsThread(trace=trace, clock=clock, collectors=collectors)
+    sampler.leases.pin(sampler.collectors)
+    # Simulated collectors are cheap; handing them to a pool costs more
+    # than it saves
+    sampler.parallel = False
+    if interval is not None:
+        sampler.profiles = None
+        sampler.interval = interval
+    sampler.on_publish = on_publish
+    end = clock.monotonic() + duration
+    if trace is not None:
+        sampler.replay(until=end)
+    else:
+        while clock.monotonic() < end:
+            sampler.step()
+    return sampler
+
+
+class StartupTimer:
+    # Seconds spent in each step between the loader importing this module and
+    # `_main` returning: "import.*" while the module loads, "main.*" in _main
+    def __init__(self):
+        self.phases = {}
+
+    def mark(self, phase, since):
+        now = time.perf_counter()
+        self.phases[phase] = now - since
+        return now
+
+    def total(self, prefix):
+        return sum(v for k, v in self.phases.items() if k.startswith(prefix))
+
+    def snapshot(self):
+        return {
+            "import_ms": round(self.total("import.") * 1e3, 3),
+            "main_ms": round(self.total("main.") * 1e3, 3),
+            "phases_ms": {k: round(v * 1e3, 3) for k, v in self.phases.items()},
+        }
+
+    def summary(self):
+        return f"import {self.total('import.') * 1e3:.1f}ms, _main " + ", ".join(
+            f"{k[5:]}={v * 1e3:.1f}ms"
+            for k, v in self.phases.items()
+            if k.startswith("main.")
+        )
+
 
+STARTUP = StartupTimer()
+STARTUP.phases["import.dependencies"] = IMPORTS_DONE - IMPORT_STARTED
 
+# Seconds to wait for the sampler thread to exit on unload
+STOP_TIMEOUT = 2
+# The last snapshot is saved to this file in the runtime dir at unload and
+# served, marked stale, by the next load if it is recent enough
+SNAPSHOT_FILE = "snapshot.json"
+SNAPSHOT_MAX_AGE = 3600
+
+
+@instrument_rpcs
 class Plugin:
     VERSION = decky_plugin.DECKY_PLUGIN_VERSION
     settingsManager = SettingsManager(
@@ -144,17 +2300,30 @@ class Plugin:
     )
     TOKEN = ""
     stats_thread = None
+    profiler = None
+    tracemalloc_snapshot = None
+    scans = SingleFlight(SCAN_TTL)
+    restored = None
 
     async def get_version(self):
         return wrap_return(self.VERSION)
 
     async def thread_output(self, command):
-        await Plugin.log_py(self, f"cli call: {command}")
         try:
-            out = self.stats_thread.output[command]
-            await Plugin.log_py(self, f"stdout capture: {out}")
-            payload = wrap_return(json.dumps(out["result"]))
-            await Plugin.log_py(self, f"return payload: {payload}")
+            # Asking for a section keeps it being sampled
+            fresh = self.stats_thread.leases.acquire((command,))
+            out = self.stats_thread.output.get(command)
+            if out is None or fresh or out.get("restored") or out.get("bootstrap"):
+                # Newly leased or not sampled live yet: have the sampler
+                # collect it right away
+                self.stats_thread.wake()
+            if out is None:
+                return wrap_return(json.dumps(None))
+            payload = wrap_return(json.dumps(out["result"], default=to_wire))
+            # Beside `data`, so its shape is the same whether or not it is live
+            flags = [f for f in ("stale", "restored", "bootstrap") if out.get(f)]
+            if flags:
+                payload.update(dict.fromkeys(flags, True), debug=out.get("debug", ""))
             return payload
         except Exception:
             except_info = traceback.format_exc()
@@ -170,16 +2339,14 @@ class Plugin:
         return await Plugin.thread_output(self, "get-memory")
 
     async def get_top_k_mem_procs(self, k=1):
-        out = DeckySpy.get_top_k_mem_procs(k)
-        payload = wrap_return(json.dumps(out["result"]))
-        await Plugin.log_py(self, f"return payload: {payload}")
-        return payload
+        out = await self.scans.run(
+            ("get-top-k-mem-procs", k), self.stats_thread.top_k_mem_procs, k
+        )
+        return wrap_return(json.dumps(out["result"], default=to_wire))
 
     async def get_boottime(self):
         out = DeckySpy.get_boottime()
-        payload = wrap_return(json.dumps(out["result"]))
-        await Plugin.log_py(self, f"return payload: {payload}")
-        return payload
+        return wrap_return(json.dumps(out["result"]))
 
     async def get_battery(self):
         return await Plugin.thread_output(self, "get-battery")
@@ -187,6 +2354,165 @@ class Plugin:
     async def get_net_interface(self):
         return await Plugin.thread_output(self, "get-net-interface")
 
+    async def poll_section(self, command, after=0, timeout=30):
+        # Long-poll: returns once `command` has a sample newer than `after`
+        self.stats_thread.leases.acquire((command,))
+        seq = await self.stats_thread.wait_for_update(command, after, timeout)
+        out = self.stats_thread.output.get(command) or {}
+        payload = {
+            "seq": seq,
+            "result": out.get("result"),
+            "stale": out.get("stale", False),
+        }
+        return wrap_return(json.dumps(payload, default=to_wire))
+
+    async def acquire_lease(self, sections, ttl=LEASE_TTL):
+        self.stats_thread.leases.acquire(sections, ttl)
+        return wrap_return(True)
+
+    async def release_lease(self, sections):
+        self.stats_thread.leases.release(sections)
+        return wrap_return(True)
+
+    async def set_sampler_interval(self, interval=None, intervals=None):
+        # Ticks are counted in multiples of the interval, so it can't be 0
+        for value in [interval, *(intervals or {}).values()]:
+            if value is None:
+                continue
+            if not isinstance(value, (int, float)) or not value > 0:
+                return wrap_return(f"interval must be positive: {value!r}", 1)
+        self.stats_thread.reconfigure(interval, intervals)
+        return wrap_return(True)
+
+    async def sample_now(self):
+        self.stats_thread.wake()
+        return wrap_return(True)
+
+    async def set_sampling_context(self, visible=None, game=None):
+        hints = {"visible": visible, "game": game}
+        self.stats_thread.set_context(
+            **{k: bool(v) for k, v in hints.items() if v is not None}
+        )
+        return wrap_return(self.stats_thread.context)
+
+    async def get_governor(self):
+        return await Plugin.thread_output(self, "get-governor")
+
+    async def get_overhead(self):
+        return await Plugin.thread_output(self, "get-overhead")
+
+    async def get_rpc_metrics(self):
+        metrics = RPC_METRICS.snapshot()
+        metrics["scans"] = self.scans.snapshot()
+        return wrap_return(json.dumps(metrics))
+
+    async def get_startup_metrics(self):
+        return wrap_return(json.dumps(STARTUP.snapshot()))
+
+    async def get_sampler_metrics(self):
+        # A process-mode sampler answers over a pipe; wait for it off the loop
+        metrics = await asyncio.to_thread(self.stats_thread.metrics)
+        return wrap_return(json.dumps(metrics))
+
+    async def start_profiler(self, duration=10, interval_ms=10):
+        if self.profiler is not None and self.profiler.is_alive():
+            return wrap_return("profiler already running", 1)
+        path = os.path.join(
+            decky_plugin.DECKY_PLUGIN_LOG_DIR,
+            time.strftime("profile-%Y%m%d-%H%M%S.folded", time.localtime()),
+        )
+        self.profiler = StackSampler(path, duration, interval_ms / 1000)
+        self.profiler.start()
+        return wrap_return(path)
+
+    async def stop_profiler(self):
+        if self.profiler is None or not self.profiler.is_alive():
+            return wrap_return("profiler not running", 1)
+        self.profiler.stop()
+        # The profile is written as the thread exits
+        await asyncio.to_thread(self.profiler.join, 5)
+        if self.profiler.is_alive():
+            return wrap_return("profile not written yet", 1)
+        return wrap_return(self.profiler.path)
+
+    async def start_tracemalloc(self, frames=1):
+        import tracemalloc
+
+        tracemalloc.start(frames)
+        self.tracemalloc_snapshot = None
+        return wrap_return(True)
+
+    async def take_tracemalloc_snapshot(self, limit=20):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return wrap_return("tracemalloc not running", 1)
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        result = {
+            "current": current,
+            "peak": peak,
+            "top": [
+                {"site": str(stat.traceback), "size": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ],
+            "diff": [],
+        }
+        if self.tracemalloc_snapshot is not None:
+            result["diff"] = [
+                {
+                    "site": str(stat.traceback),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in snapshot.compare_to(self.tracemalloc_snapshot, "lineno")[
+                    :limit
+                ]
+            ]
+        self.tracemalloc_snapshot = snapshot
+        return wrap_return(json.dumps(result))
+
+    async def stop_tracemalloc(self):
+        import tracemalloc
+
+        tracemalloc.stop()
+        self.tracemalloc_snapshot = None
+        return wrap_return(True)
+
+    async def start_trace_recording(self):
+        trace_dir = os.path.join(decky_plugin.DECKY_PLUGIN_LOG_DIR, "traces")
+        os.makedirs(trace_dir, exist_ok=True)
+        path = os.path.join(
+            trace_dir, time.strftime("trace-%Y%m%d-%H%M%S.jsonl.gz", time.localtime())
+        )
+        self.stats_thread.start_recording(path)
+        decky_plugin.logger.info(f"[DeckySpy][B]Recording trace to {path}")
+        return wrap_return(path)
+
+    async def stop_trace_recording(self):
+        path = await asyncio.to_thread(self.stats_thread.stop_recording)
+        if path is None:
+            return wrap_return("", 1)
+        decky_plugin.logger.info(f"[DeckySpy][B]Trace saved to {path}")
+        return wrap_return(path)
+
+    async def start_trace_replay(self, path, speed=1.0):
+        if not os.path.isfile(path):
+            return wrap_return(f"trace not found: {path}", 1)
+        await Plugin._stop_stats_thread(self)
+        await Plugin._start_stats_thread(self, trace=path, speed=speed)
+        decky_plugin.logger.info(f"[DeckySpy][B]Replaying {path} at {speed}x")
+        return wrap_return(path)
+
+    async def stop_trace_replay(self):
+        if self.stats_thread.trace is None:
+            return wrap_return(False)
+        await Plugin._stop_stats_thread(self)
+        await Plugin._start_stats_thread(self)
+        return wrap_return(True)
+
     async def log(self, message):
         value = await Plugin.get_settings(self, "debug.frontend", True, string=False)
         if value:
@@ -211,11 +2537,19 @@ class Plugin:
 
     async def set_settings(self, key, value):
         self.settingsManager.setSetting(key, value)
+        if self.stats_thread is None:
+            return
+        if key in ALERT_SECTIONS:
+            self.stats_thread.leases.pin((ALERT_SECTIONS[key][0],), bool(value))
+        if key in BUDGET_SETTINGS:
+            self.stats_thread.set_budgets(**{BUDGET_SETTINGS[key]: value})
 
     async def commit_settings(self):
         self.settingsManager.commit()
 
     async def get_token(self):
+        import uuid
+
         self.TOKEN = str(uuid.uuid4())[:6]
         await Plugin.log_py(self, f"Generated new token: {self.TOKEN}")
         return wrap_return(self.TOKEN)
@@ -227,15 +2561,131 @@ class Plugin:
 
     # Asyncio-compatible long-running code, executed in a task when the plugin is loaded
     async def _main(self):
+        began = time.perf_counter()
         self.settingsManager.read()
         decky_plugin.logger.info(f"=== Load Decky Spy ver{self.VERSION} ===")
         self.TOKEN = ""
-        self.stats_thread = StatsThread()
+        began = STARTUP.mark("main.settings", began)
+        self.restored = Plugin._load_snapshot(self)
+        began = STARTUP.mark("main.snapshot", began)
+        await Plugin._start_stats_thread(self)
+        began = STARTUP.mark("main.sampler", began)
+        # Everything so far lives as long as the plugin; frozen, it is left
+        # out of every later full collection
+        gc.collect()
+        gc.freeze()
+        GC_MONITOR.install()
+        STARTUP.mark("main.gc", began)
+        decky_plugin.logger.info(f"[DeckySpy][B]Started: {STARTUP.summary()}")
+
+    async def _start_stats_thread(self, **kwargs):
+        config = {
+            "overhead_budget": await Plugin.get_settings(
+                self, "overhead.budget", 0, string=False
+            ),
+            "cpu_budget": await Plugin.get_settings(
+                self, "sampler.cpu_budget", 0.5, string=False
+            ),
+            "timer_slack": await Plugin.get_settings(
+                self, "sampler.timer_slack_ms", 0, string=False
+            )
+            / 1000,
+            "scheduling": {
+                "policy": await Plugin.get_settings(
+                    self, "sampler.sched_policy", None, string=False
+                ),
+                "nice": await Plugin.get_settings(
+                    self, "sampler.nice", None, string=False
+                ),
+                "cpus": await Plugin.get_settings(
+                    self, "sampler.cpus", None, string=False
+                ),
+            },
+            "pins": [
+                (section, bool(await Plugin.get_settings(self, key, default, False)))
+                for key, (section, default) in ALERT_SECTIONS.items()
+            ],
+        }
+        mode = await Plugin.get_settings(self, "sampler.mode", "thread", string=False)
+        if "trace" in kwargs:
+            mode = "thread"
+        if mode == "process":
+            self.stats_thread = ProcessSampler(config)
+        elif mode == "asyncio":
+            self.stats_thread = AsyncSampler()
+            self.stats_thread.configure(**config)
+        else:
+            self.stats_thread = StatsThread(**kwargs)
+            self.stats_thread.configure(**config)
+            self.stats_thread.attach(asyncio.get_running_loop())
+        if self.restored and "trace" not in kwargs:
+            self.stats_thread.restore(self.restored)
+        self.restored = None
+        if "trace" not in kwargs:
+            self.stats_thread.bootstrap()
         self.stats_thread.start()
 
+    def _load_snapshot(self):
+        path = os.path.join(decky_plugin.DECKY_PLUGIN_RUNTIME_DIR, SNAPSHOT_FILE)
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            decky_plugin.logger.warning(f"[DeckySpy][B]Ignoring {path}: {e}")
+            return None
+        age = time.time() - snapshot.get("time", 0)
+        if snapshot.get("version") != self.VERSION or not 0 <= age <= SNAPSHOT_MAX_AGE:
+            return None
+        debug = f"restored from a snapshot taken {age:.0f}s ago"
+        return {
+            key: {"result": result, "debug": debug, "stale": True, "restored": True}
+            for key, result in snapshot.get("sections", {}).items()
+        }
+
+    def _save_snapshot(self):
+        # Live sections only: restored and failing ones are already stale
+        if self.stats_thread is None or self.stats_thread.trace is not None:
+            return
+        snapshot = {
+            "version": self.VERSION,
+            "time": time.time(),
+            "sections": {
+                key: out["result"]
+                for key, out in self.stats_thread.output.items()
+                if not out.get("stale")
+            },
+        }
+        path = os.path.join(decky_plugin.DECKY_PLUGIN_RUNTIME_DIR, SNAPSHOT_FILE)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                json.dump(snapshot, f, default=to_wire)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            decky_plugin.logger.warning(f"[DeckySpy][B]Could not save {path}: {e}")
+
+    async def _stop_stats_thread(self):
+        # The sampler wakes at once; the timeout only covers a collector
+        # stuck in a read
+        if not await self.stats_thread.shutdown(STOP_TIMEOUT):
+            decky_plugin.logger.warning(
+                f"[DeckySpy][B]Sampler did not stop within {STOP_TIMEOUT}s"
+            )
+
     # Function called first during the unload process, utilize this to handle your plugin being removed
     async def _unload(self):
-        self.stats_thread.stop()
+        await Plugin._stop_stats_thread(self)
+        Plugin._save_snapshot(self)
+        if self.profiler is not None:
+            self.profiler.stop()
+        # Only loaded if a tracemalloc RPC was used
+        tracemalloc = sys.modules.get("tracemalloc")
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        GC_MONITOR.uninstall()
+        gc.unfreeze()
         decky_plugin.logger.info("=== Unload Decky Spy ===")
 
     # Migrations that should be performed before entering `_main()`.
@@ -267,3 +2717,6 @@ class Plugin:
                 decky_plugin.DECKY_USER_HOME, ".local", "share", "decky-template"
             ),
         )
+
+
+STARTUP.mark("import.module", IMPORTS_DONE)
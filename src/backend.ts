@@ -29,11 +29,14 @@ export class Backend {
     public playtime: number = 0; // in seconds
     public lastPlaytime: number = 0; // in seconds
     public debugInfo: string[] = [];
+    // Sections last served stale, with the backend's note on why
+    public staleSections: { [functionName: string]: string } = {};
     private oomIntervalTimerRef: NodeJS.Timeout | null = null;
     private aaLastWarnTime: number = 0;
     private queueForSaveTime: number | null = null;
     private unregisterHandlers: (() => void)[] = [];
     private token = '';
+    private samplingContext = { visible: false, game: false };
     constructor(serverAPI: ServerAPI) {
         this.serverAPI = serverAPI;
     }
@@ -252,7 +255,21 @@ export class Backend {
         }
     }
 
+    // Let the backend pick a sampling rate for the current context
+    async setSamplingContext(hints: { visible?: boolean; game?: boolean }) {
+        const context = { ...this.samplingContext, ...hints };
+        if (
+            context.visible === this.samplingContext.visible &&
+            context.game === this.samplingContext.game
+        ) {
+            return;
+        }
+        this.samplingContext = context;
+        await this.bridge('set_sampling_context', context);
+    }
+
     refreshPlayTime() {
+        this.setSamplingContext({ game: Router.RunningApps.length > 0 });
         if (Router.RunningApps.length > 0) {
             if (this.systemInfo.gameSessionStartTime == 0) {
                 this.systemInfo.gameSessionStartTime = Date.now() / 1000;
@@ -277,7 +294,9 @@ export class Backend {
 
         if (this.settings.refresh.enabled) {
             if (this.refreshStep == 0) {
-                await this.getNIs();
+                if (this.settings.network.enabled) {
+                    await this.getNIs();
+                }
                 await this.getBattery();
                 await this.getCPU();
                 await this.getMemory();
@@ -534,6 +553,7 @@ export class Backend {
             }
             const payload = ret.result as BackendReturn;
             if (payload.code == 0) {
+                this.noteStale(functionName, payload);
                 return payload.data;
             }
             const errMessage = `${functionName} return fail: ${JSON.stringify(
@@ -546,6 +566,19 @@ export class Backend {
         return null;
     }
 
+    noteStale(functionName: string, payload: BackendReturn) {
+        if (payload.stale) {
+            this.staleSections[functionName] = payload.debug || 'stale';
+        } else if (functionName in this.staleSections) {
+            delete this.staleSections[functionName];
+        } else {
+            return;
+        }
+        this.debugInfo = Object.entries(this.staleSections).map(
+            ([name, note]) => `${name}: ${note}`,
+        );
+    }
+
     setupSuspendResumeHandler() {
         const { unregister: unregisterOnResumeFromSuspend } =
             SteamClient.System.RegisterForOnResumeFromSuspend(() => {
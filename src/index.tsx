@@ -38,6 +38,7 @@ const Content: VFC<{ backend: Backend }> = ({ backend }) => {
         });
     };
     useEffect(() => {
+        backend.setSamplingContext({ visible: true });
         pollTimerRef.current = setInterval(async () => {
             await refreshStatus();
         }, 500);
@@ -46,6 +47,7 @@ const Content: VFC<{ backend: Backend }> = ({ backend }) => {
             if (pollTimerRef) {
                 clearInterval(pollTimerRef.current);
             }
+            backend.setSamplingContext({ visible: false });
         };
     }, []);
 
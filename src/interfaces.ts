@@ -164,6 +164,12 @@ export const DefaultSettings: Settings = {
 export interface BackendReturn {
 	code: number;
 	data: any;
+	// Set on sections served from a bootstrap sample, an earlier session's
+	// snapshot or a failing collector, with the reason in debug
+	stale?: boolean;
+	restored?: boolean;
+	bootstrap?: boolean;
+	debug?: string;
 }
 
 // From https://github.com/popsUlfr/SDH-PauseGames.git
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fakefs import make_tree  # noqa: E402
+from benchmarks.harness import load_main  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def main():
+    return load_main()
+
+
+@pytest.fixture
+def tree(main, tmp_path):
+    # A synthetic /proc and /sys for the collectors, reset afterwards
+    procfs, sysfs = make_tree(str(tmp_path / "tree"), processes=50)
+    main.DeckySpy.set_roots(procfs, sysfs)
+    yield procfs, sysfs
+    main.DeckySpy.set_roots("/proc", "/sys")
+
+
+def write_cpu(procfs, user, idle):
+    # /proc/stat's cpu line with `user` and `idle` jiffies
+    with open(os.path.join(procfs, "stat"), "w") as f:
+        f.write(f"cpu  {user} 0 0 {idle} 0 0 0 0 0 0\nbtime 0\n")
+
+
+def run_benchmark(*args):
+    # A benchmark module run as a gate, from the repository root
+    return subprocess.run(
+        [sys.executable, "-m", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
@@ -0,0 +1,21 @@
+import gc
+
+from conftest import run_benchmark
+
+
+def test_sampler_cycles_do_not_accumulate_allocations():
+    result = run_benchmark(
+        "benchmarks.records", "--processes", "200", "--hours", "0.25"
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_young_generation_is_collected_in_an_idle_window(main):
+    gc.collect()
+    # Half way to the automatic threshold, as left by earlier cycles
+    pending = [[] for _ in range(gc.get_threshold()[0] // 2)]
+    sampler = main.simulate(
+        5, collectors={"get-cpu": lambda: {"result": len(pending), "debug": ""}}
+    )
+    assert sampler.idle_collections == 1
+    assert len(sampler.block_deltas) == 4
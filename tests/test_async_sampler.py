@@ -0,0 +1,37 @@
+import asyncio
+import threading
+
+
+def test_async_sampler_runs_overhead_on_the_loop(main):
+    def where():
+        return {"result": threading.current_thread().name, "debug": ""}
+
+    sampler = main.AsyncSampler(collectors={"get-overhead": where, "get-cpu": where})
+
+    async def collect():
+        sampler.attach(asyncio.get_running_loop())
+        return [await sampler.call(key, where) for key in ("get-overhead", "get-cpu")]
+
+    overhead, cpu = asyncio.run(collect())
+    sampler.executor.shutdown()
+    assert overhead["result"] == threading.current_thread().name
+    assert cpu["result"].startswith("DeckySpySampler")
+
+
+def test_async_sampler_delivers_samples_to_waiters_on_the_loop(main):
+    sampler = main.AsyncSampler(
+        collectors={"get-cpu": lambda: {"result": 12.5, "debug": ""}}
+    )
+    sampler.leases.pin(("get-cpu",))
+
+    async def poll():
+        sampler.start()
+        first = await sampler.wait_for_update("get-cpu", timeout=1)
+        sampler.wake()
+        second = await sampler.wait_for_update("get-cpu", after=first, timeout=1)
+        assert await sampler.shutdown(1)
+        return first, second
+
+    first, second = asyncio.run(poll())
+    assert 0 < first < second
+    assert sampler.output["get-cpu"]["result"] == 12.5
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+
+def record_trace(main, path, lines, step):
+    clock = main.VirtualClock()
+    recorder = main.TraceRecorder(path, clock=clock)
+    for i in range(lines):
+        recorder.record({"get-cpu": {"result": i, "debug": ""}})
+        clock.sleep(step)
+    recorder.close()
+
+
+def test_replay_keeps_pace_when_woken(main, tmp_path):
+    path = str(tmp_path / "trace.jsonl.gz")
+    record_trace(main, path, lines=20, step=1)
+    clock = main.VirtualClock()
+    sampler = main.StatsThread(trace=path, clock=clock)
+    # As left by thread_output or set_sampling_context
+    sampler.wake()
+    sampler.replay(until=5.5)
+    assert sampler.output["get-cpu"]["result"] == 5
+    assert clock.monotonic() >= 5
+
+
+def test_replay_thread_ignores_wakes_and_stops_at_once(main, tmp_path):
+    path = str(tmp_path / "trace.jsonl.gz")
+    record_trace(main, path, lines=20, step=1)
+    sampler = main.StatsThread(trace=path)
+    sampler.start()
+    for _ in range(5):
+        sampler.wake()
+        threading.Event().wait(0.02)
+    assert sampler.is_alive()
+    assert sampler.output["get-cpu"]["result"] == 0
+    sampler.stop()
+    sampler.join(1)
+    assert not sampler.is_alive()
+
+
+def test_sampler_interval_must_be_positive(main):
+    plugin = main.Plugin()
+    plugin.stats_thread = sampler = main.StatsThread()
+    interval = sampler.interval
+    for args in [(0,), (-1,), (None, {"get-cpu": 0}), (1, {"get-cpu": "fast"})]:
+        out = asyncio.run(main.Plugin.set_sampler_interval(plugin, *args))
+        assert out["code"] == 1
+    assert sampler.interval == interval and "get-cpu" not in sampler.intervals
+    out = asyncio.run(main.Plugin.set_sampler_interval(plugin, 0.5, {"get-cpu": 2}))
+    assert out["code"] == 0
+    assert sampler.period("get-cpu") == 4
+
+
+def test_sampler_wakes_and_stops_without_waiting_out_its_interval(main):
+    published = threading.Event()
+    sampler = main.StatsThread(
+        collectors={"get-cpu": lambda: {"result": 0, "debug": ""}}
+    )
+    sampler.leases.pin(("get-cpu",))
+    sampler.reconfigure(interval=60)
+    sampler.start()
+    try:
+        # Past the first cycle, then woken for a sample on demand
+        threading.Event().wait(0.1)
+        sampler.on_publish = lambda outputs: published.set()
+        sampler.wake()
+        assert published.wait(1)
+    finally:
+        sampler.stop()
+        sampler.join(1)
+    assert not sampler.is_alive()
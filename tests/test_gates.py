@@ -0,0 +1,6 @@
+from conftest import run_benchmark
+
+
+def test_startup_stays_within_budget():
+    result = run_benchmark("benchmarks.startup", "--runs", "5")
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,45 @@
+def test_governor_widens_the_costliest_collector_over_budget(main):
+    governor = main.Governor(["get-cpu", "get-memory"], budget=1)
+    governor.record_cost("get-cpu", 4_000_000)
+    governor.record_cost("get-memory", 1_000_000)
+    intervals = {"get-cpu": 1, "get-memory": 1}
+    # 5% of a core, past half a window
+    for now in range(7):
+        governor.update(now, now * 0.05, intervals)
+    assert governor.usage > governor.budget
+    assert governor.scales == {"get-cpu": 2, "get-memory": 1}
+
+
+def test_governor_narrows_again_once_there_is_room(main):
+    governor = main.Governor(["get-cpu", "get-memory"], budget=1)
+    governor.record_cost("get-cpu", 4_000_000)
+    governor.scales["get-cpu"] = 2
+    governor.last_change = 0
+    intervals = {"get-cpu": 2, "get-memory": 1}
+    for now in range(1, 10):
+        governor.update(now, 0.3, intervals)
+    # Not within a window of the last change
+    assert governor.scales["get-cpu"] == 2
+    for now in range(10, 20):
+        governor.update(now, 0.3, intervals)
+    assert governor.scales == {"get-cpu": 1, "get-memory": 1}
+
+
+def test_governor_holds_while_narrowing_would_exceed_half_the_budget(main):
+    governor = main.Governor(["get-cpu"], budget=1)
+    # 5% of a core at 1 s, 2.5% at 2 s
+    governor.record_cost("get-cpu", 50_000_000)
+    governor.scales["get-cpu"] = 2
+    for now in range(30):
+        governor.update(now, 0.3, {"get-cpu": 2})
+    assert governor.scales["get-cpu"] == 2
+
+
+def test_sampler_periods_follow_the_governor(main):
+    sampler = main.StatsThread(clock=main.VirtualClock())
+    sampler.interval = 1
+    sampler.intervals = {"get-battery": 5}
+    sampler.governor.scales["get-battery"] = 4
+    assert sampler.period("get-battery") == 20
+    assert sampler.effective_intervals()["get-battery"] == 20
+    assert sampler.effective_intervals()["get-cpu"] == 1
@@ -0,0 +1,38 @@
+import asyncio
+
+
+def test_lease_acquire_reports_new_sections(main):
+    clock = main.VirtualClock()
+    leases = main.LeaseTable(clock)
+    leases.pin(("get-battery",))
+    assert leases.acquire(("get-cpu", "get-battery"), ttl=10) == ["get-cpu"]
+    assert leases.acquire(("get-cpu",), ttl=10) == []
+    clock.sleep(11)
+    assert leases.active() == {"get-battery"}
+    assert leases.acquire(("get-cpu",), ttl=10) == ["get-cpu"]
+
+
+def test_lapsed_sections_are_served_stale(main):
+    clock = main.VirtualClock()
+    plugin = main.Plugin()
+    plugin.stats_thread = sampler = main.StatsThread(clock=clock)
+    sampler.leases.acquire(("get-cpu",), ttl=10)
+    sampler.publish({"get-cpu": {"result": 12.5, "debug": ""}})
+    assert [key for key, _ in sampler.due(0)] == ["get-cpu"]
+    assert "stale" not in sampler.output["get-cpu"]
+    clock.sleep(11)
+    assert sampler.due(1) == []
+    out = asyncio.run(main.Plugin.thread_output(plugin, "get-cpu"))
+    assert out["data"] == "12.5" and out["stale"]
+    assert sampler.wakeup.is_set()
+
+
+def test_only_leased_or_pinned_sections_are_due(main):
+    sampler = main.StatsThread(clock=main.VirtualClock())
+    assert sampler.due(0) == []
+    sampler.leases.pin(("get-memory",))
+    sampler.leases.acquire(("get-cpu",))
+    assert sorted(key for key, _ in sampler.due(0)) == ["get-cpu", "get-memory"]
+    sampler.leases.release(("get-cpu",))
+    sampler.leases.pin(("get-memory",), False)
+    assert sampler.due(0) == []
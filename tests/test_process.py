@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def worker(main, tree):
+    sampler = main.ProcessSampler({})
+    sampler.REPLY_TIMEOUT = 0.2
+    sampler.start()
+    yield sampler
+    os.kill(sampler.process.pid, signal.SIGCONT)
+    assert asyncio.run(sampler.shutdown(2))
+
+
+def test_late_reply_is_not_returned_to_the_next_call(worker):
+    assert "cycles" in worker.metrics()
+    os.kill(worker.process.pid, signal.SIGSTOP)
+    assert "cycles" not in worker.metrics()
+    os.kill(worker.process.pid, signal.SIGCONT)
+    # The metrics reply arrives after its call gave up on it
+    time.sleep(0.2)
+    assert worker.stop_recording() is None
+    assert "cycles" in worker.metrics()
+
+
+def test_reply_is_awaited_off_the_event_loop(main, worker):
+    plugin = main.Plugin()
+    plugin.stats_thread = worker
+    os.kill(worker.process.pid, signal.SIGSTOP)
+
+    async def longest_gap():
+        gaps = []
+
+        async def tick():
+            last = time.monotonic()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0.02)
+        await main.Plugin.get_sampler_metrics(plugin)
+        # Lets the ticker see a stall the call caused
+        await asyncio.sleep(0.02)
+        ticker.cancel()
+        return max(gaps)
+
+    assert asyncio.run(longest_gap()) < worker.REPLY_TIMEOUT / 2
+
+
+def test_concurrent_calls_each_get_their_own_reply(worker, tmp_path):
+    for i in range(10):
+        path = str(tmp_path / f"trace{i}.jsonl.gz")
+        worker.start_recording(path)
+        results = {}
+        calls = {"metrics": worker.metrics, "stop_recording": worker.stop_recording}
+        threads = [
+            threading.Thread(target=lambda n=n, f=f: results.update({n: f()}))
+            for n, f in calls.items()
+        ]
+        # Both calls are made while another is waiting for its reply
+        with worker.reply_lock:
+            for thread in threads:
+                thread.start()
+            time.sleep(0.05)
+        for thread in threads:
+            thread.join()
+        assert "cycles" in results["metrics"]
+        assert results["stop_recording"] == path
+
+
+def test_restarted_worker_keeps_current_pins(main, tree):
+    sampler = main.ProcessSampler({"pins": [("get-memory", True)]})
+    sampler.start()
+    try:
+        assert "get-memory" in sampler.metrics()["leases"]["pinned"]
+        sampler.leases.pin(("get-memory",), False)
+        pid = sampler.process.pid
+        os.kill(pid, signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while sampler.restarts == 0 or not sampler.is_alive():
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert sampler.process.pid != pid
+        assert "get-memory" not in sampler.metrics()["leases"]["pinned"]
+    finally:
+        assert asyncio.run(sampler.shutdown(2))
+
+
+def test_top_k_scan_runs_in_the_worker(main, worker, monkeypatch):
+    plugin = main.Plugin()
+    plugin.stats_thread = worker
+    plugin.scans = main.SingleFlight()
+
+    def scanned_here(k):
+        raise AssertionError("scanned in the plugin's process")
+
+    # Only this process's copy: the worker was forked before
+    monkeypatch.setattr(main.DeckySpy, "get_top_k_mem_procs", scanned_here)
+    out = asyncio.run(main.Plugin.get_top_k_mem_procs(plugin, 3))
+    procs = json.loads(out["data"])
+    assert len(procs) == 3
+    assert procs[0]["mem"]["rss"] >= procs[-1]["mem"]["rss"]
@@ -0,0 +1,37 @@
+import asyncio
+import json
+import threading
+
+
+def test_stop_profiler_returns_once_the_profile_is_written(main, tmp_path):
+    plugin = main.Plugin()
+    path = str(tmp_path / "profile.folded")
+    plugin.profiler = main.StackSampler(path, duration=10, interval=0.01)
+    plugin.profiler.start()
+    threading.Event().wait(0.05)
+    out = asyncio.run(main.Plugin.stop_profiler(plugin))
+    assert out == {"code": 0, "data": path}
+    with open(path) as f:
+        assert f.read()
+    assert asyncio.run(main.Plugin.stop_profiler(plugin))["code"] == 1
+
+
+def test_tracemalloc_snapshots_diff_against_the_previous_one(main):
+    plugin = main.Plugin()
+
+    async def snapshots():
+        assert (await main.Plugin.take_tracemalloc_snapshot(plugin))["code"] == 1
+        await main.Plugin.start_tracemalloc(plugin)
+        try:
+            first = await main.Plugin.take_tracemalloc_snapshot(plugin, limit=5)
+            kept = [bytearray(1000) for _ in range(100)]
+            second = await main.Plugin.take_tracemalloc_snapshot(plugin, limit=5)
+        finally:
+            await main.Plugin.stop_tracemalloc(plugin)
+        del kept
+        return json.loads(first["data"]), json.loads(second["data"])
+
+    first, second = asyncio.run(snapshots())
+    assert first["top"] and first["diff"] == []
+    assert len(second["top"]) <= 5
+    assert second["diff"][0]["size_diff"] >= 100_000
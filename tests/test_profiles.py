@@ -0,0 +1,55 @@
+def battery(main, plugged=False, restored=False):
+    out = {"result": main.BatteryRecord(True, 50, 3600, plugged), "debug": ""}
+    if restored:
+        out.update(stale=True, restored=True)
+    return out
+
+
+def test_profile_follows_visibility_power_and_game(main):
+    sampler = main.StatsThread(clock=main.VirtualClock())
+    sampler.select_profile(0)
+    assert (sampler.profile, sampler.interval) == ("background", 5)
+    sampler.context["visible"] = True
+    sampler.select_profile(1)
+    assert (sampler.profile, sampler.interval) == ("visible", 1)
+    sampler.context["visible"] = False
+    sampler.publish({"get-battery": battery(main)})
+    sampler.select_profile(2)
+    assert (sampler.profile, sampler.interval) == ("battery", 30)
+    # A running game keeps its background pace on battery
+    sampler.context["game"] = True
+    sampler.select_profile(3)
+    assert sampler.profile == "background"
+    sampler.context["game"] = False
+    sampler.publish({"get-battery": battery(main, plugged=True)})
+    sampler.select_profile(4)
+    assert sampler.profile == "background"
+
+
+def test_profile_ignores_a_restored_battery_section(main):
+    sampler = main.StatsThread(clock=main.VirtualClock())
+    sampler.restore({"get-battery": battery(main, restored=True)})
+    sampler.select_profile(0)
+    assert sampler.profile == "background"
+
+
+def test_profile_change_restarts_the_grid(main):
+    sampler = main.StatsThread(clock=main.VirtualClock())
+    sampler.select_profile(0)
+    sampler.tick = 7
+    sampler.next_due["get-cpu"] = 9
+    sampler.context["visible"] = True
+    sampler.select_profile(12.5)
+    assert (sampler.epoch, sampler.tick) == (12.5, 0)
+    assert sampler.next_due["get-cpu"] == 0
+
+
+def test_fixed_interval_replaces_the_profiles(main):
+    sampler = main.StatsThread(clock=main.VirtualClock())
+    sampler.reconfigure(interval=2)
+    sampler.context["visible"] = True
+    sampler.select_profile(0)
+    assert (sampler.profile, sampler.interval) == (None, 2)
+    sampler.reconfigure()
+    sampler.select_profile(1)
+    assert (sampler.profile, sampler.interval) == ("visible", 1)
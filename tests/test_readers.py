@@ -0,0 +1,40 @@
+import psutil
+
+from conftest import write_cpu
+
+
+def test_memory_reader_matches_psutil(main, tree):
+    memory = main.DeckySpy.get_memory()["result"]
+    vmem, swap = psutil.virtual_memory(), psutil.swap_memory()
+    assert (memory.total, memory.used, memory.percent) == (
+        vmem.total,
+        vmem.used,
+        vmem.percent,
+    )
+    assert (memory.swap_total, memory.swap_used, memory.swap_percent) == (
+        swap.total,
+        swap.used,
+        swap.percent,
+    )
+
+
+def test_cpu_reader_matches_psutil(main, tree):
+    procfs, _ = tree
+    write_cpu(procfs, user=1000, idle=9000)
+    psutil.cpu_percent()
+    main.DeckySpy.get_cpu()
+    for user, idle in ((4000, 11000), (4100, 20000), (20000, 20000)):
+        write_cpu(procfs, user=user, idle=idle)
+        assert main.DeckySpy.get_cpu()["result"] == psutil.cpu_percent()
+
+
+def test_readers_follow_a_growing_file(main, tree):
+    procfs, _ = tree
+    path = procfs + "/meminfo"
+    with open(path) as f:
+        content = f.read()
+    # Past the reader's initial buffer
+    with open(path, "w") as f:
+        f.write(content + "".join(f"Filler{i}:   0 kB\n" for i in range(400)))
+    assert main.DeckySpy.get_memory()["result"].total == psutil.virtual_memory().total
+    assert main.DeckySpy.reader(path).read() > 4096
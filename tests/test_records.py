@@ -0,0 +1,69 @@
+import json
+
+import psutil
+
+
+def wire(value, main):
+    return json.dumps(value, default=main.to_wire)
+
+
+def test_memory_and_battery_records_serialize_to_the_frontend_shapes(main, tree):
+    vmem, swap = psutil.virtual_memory(), psutil.swap_memory()
+    expected = {
+        "vmem": {"total": vmem.total, "used": vmem.used, "percent": vmem.percent},
+        "swap": {"total": swap.total, "used": swap.used, "percent": swap.percent},
+    }
+    assert wire(main.DeckySpy.get_memory()["result"], main) == json.dumps(expected)
+    battery = main.DeckySpy.sensors_battery()
+    expected = {
+        "battery": True,
+        "percent": battery.percent,
+        "secsleft": battery.secsleft,
+        "plugged": battery.power_plugged,
+    }
+    assert wire(main.DeckySpy.get_battery()["result"], main) == json.dumps(expected)
+
+
+def test_process_records_serialize_to_the_frontend_shape(main, tree):
+    procs = [
+        {
+            "pid": p.pid,
+            "name": p.info["name"],
+            "mem": {
+                "rss": p.info["memory_info"].rss,
+                "vms": p.info["memory_info"].vms,
+            },
+        }
+        for p in psutil.process_iter(["name", "memory_info"])
+    ]
+    expected = sorted(procs, key=lambda x: x["mem"]["rss"], reverse=True)[:10]
+    top = main.DeckySpy.get_top_k_mem_procs(10)["result"]
+    assert wire(top, main) == json.dumps(expected)
+
+
+def test_interface_records_serialize_to_the_frontend_shape(main):
+    expected = [
+        {
+            "name": nic,
+            "addresses": [
+                {
+                    "family": main.af_map.get(addr.family, addr.family),
+                    "address": addr.address,
+                    "netmask": addr.netmask or "",
+                    "broadcast": addr.broadcast or "",
+                    "p2p": addr.ptp or "",
+                }
+                for addr in addrs
+            ],
+        }
+        for nic, addrs in psutil.net_if_addrs().items()
+    ]
+    result = main.DeckySpy.get_net_interface()["result"]
+    assert wire(result, main) == json.dumps(expected)
+
+
+def test_records_compare_by_value(main):
+    record = main.ProcessRecord(1, "init", 4096, 8192)
+    assert record == main.ProcessRecord(1, "init", 4096, 8192)
+    assert record != main.ProcessRecord(1, "init", 4096, 0)
+    assert not hasattr(record, "__dict__")
@@ -0,0 +1,35 @@
+import asyncio
+
+
+def test_load_and_unload_are_not_counted_as_rpcs(main, tree):
+    before = main.RPC_METRICS.method("get_settings")["count"]
+    plugin = main.Plugin()
+
+    async def load():
+        await main.Plugin._main(plugin)
+        await main.Plugin._unload(plugin)
+
+    asyncio.run(load())
+    assert main.RPC_METRICS.method("get_settings")["count"] == before
+
+
+def test_rpc_bytes_count_encoded_strings_only(main):
+    metrics = main.RpcMetrics()
+    stats = metrics.method("get_cpu")
+    metrics.record(stats, 1000, {"code": 0, "data": '"é"'})
+    metrics.record(stats, 1000, {"code": 0, "data": {"large": "x" * 100}})
+    assert stats["count"] == 2
+    assert stats["bytes"] == stats["max_bytes"] == 4
+
+
+def test_calls_between_plugin_methods_are_counted_once(main, tree):
+    plugin = main.Plugin()
+    plugin.stats_thread = main.StatsThread()
+    names = ("get_cpu", "thread_output")
+    before = {name: main.RPC_METRICS.method(name)["count"] for name in names}
+    out = asyncio.run(main.Plugin.get_cpu(plugin))
+    assert out["code"] == 0
+    stats = {name: main.RPC_METRICS.method(name) for name in names}
+    assert stats["get_cpu"]["count"] == before["get_cpu"] + 1
+    assert stats["thread_output"]["count"] == before["thread_output"]
+    assert stats["get_cpu"]["inflight"] == 0
@@ -0,0 +1,57 @@
+import pytest
+
+
+def timed_sampler(main, seconds):
+    # A collector that takes `seconds[0]` of virtual time on each call
+    clock = main.VirtualClock()
+    starts = []
+
+    def collect():
+        starts.append(clock.monotonic())
+        clock.sleep(seconds[0])
+        return {"result": 0, "debug": ""}
+
+    sampler = main.StatsThread(clock=clock, collectors={"get-cpu": collect})
+    sampler.leases.pin(("get-cpu",))
+    sampler.parallel = False
+    sampler.profiles = None
+    return sampler, starts
+
+
+def test_ticks_do_not_drift_with_collector_time(main):
+    sampler, starts = timed_sampler(main, [0.3])
+    for _ in range(50):
+        sampler.step()
+    assert starts == pytest.approx(list(range(50)))
+    assert sampler.overruns == 0
+
+
+def test_overrun_ticks_are_skipped_not_queued(main):
+    seconds = [0.3]
+    sampler, starts = timed_sampler(main, seconds)
+    sampler.step()
+    seconds[0] = 2.5
+    sampler.step()
+    seconds[0] = 0.3
+    sampler.step()
+    sampler.step()
+    # Ticks 2 to 3 passed during the slow cycle; the next one is tick 4
+    assert starts == pytest.approx([0, 1, 4, 5])
+    assert sampler.overruns == 1
+
+
+def test_collectors_share_the_tick_grid(main):
+    sampler = main.StatsThread(clock=main.VirtualClock())
+    sampler.leases.pin(("get-cpu", "get-memory", "get-battery"))
+    sampler.interval = 1
+    sampler.intervals = {"get-memory": 2, "get-battery": 4}
+    fired = {}
+    for tick in range(8):
+        for key, _ in sampler.due(tick):
+            fired.setdefault(key, []).append(tick)
+            sampler.finish_call(key, tick)
+    assert fired == {
+        "get-cpu": list(range(8)),
+        "get-memory": [0, 2, 4, 6],
+        "get-battery": [0, 4],
+    }
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+import time
+
+
+def test_self_monitor_holds_rates_over_short_windows(main):
+    monitor = main.SelfMonitor(budget=0.01)
+    first = monitor.sample()["result"]
+    # Busy for a few ticks, then sampled again at once, as after sample_now
+    began = time.process_time()
+    while time.process_time() - began < 0.05:
+        pass
+    held = monitor.sample()["result"]
+    assert held["cpu_percent"] == first["cpu_percent"] == 0.0
+    assert not held["over_budget"]
+    monitor.last = (monitor.last[0] - monitor.MIN_WINDOW, monitor.last[1])
+    rated = monitor.sample()["result"]
+    assert rated["cpu_percent"] > 0 and rated["over_budget"]
+
+
+def test_budget_settings_reach_a_running_sampler(main):
+    plugin = main.Plugin()
+    plugin.stats_thread = sampler = main.StatsThread()
+    try:
+        asyncio.run(main.Plugin.set_settings(plugin, "overhead.budget", 5))
+        asyncio.run(main.Plugin.set_settings(plugin, "sampler.cpu_budget", 0.7))
+        assert sampler.self_monitor.budget == 5
+        assert sampler.governor.budget == 0.7
+        assert "get-overhead" in sampler.leases.active()
+    finally:
+        plugin.settingsManager.settings.clear()
+
+
+def test_self_monitor_reports_the_plugins_footprint(main):
+    result = main.SelfMonitor().sample()["result"]
+    assert result["rss"] > 0
+    assert result["threads"] >= threading.active_count()
+    assert not result["over_budget"]
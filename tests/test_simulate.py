@@ -0,0 +1,44 @@
+import time
+
+
+def counter():
+    calls = []
+
+    def collect():
+        calls.append(None)
+        return {"result": len(calls), "debug": ""}
+
+    return calls, collect
+
+
+def test_simulate_runs_a_day_of_sampling_in_virtual_time(main):
+    calls, collect = counter()
+    began = time.monotonic()
+    sampler = main.simulate(86400, collectors={"get-cpu": collect})
+    assert time.monotonic() - began < 30
+    assert len(calls) == sampler.cycles == 86400
+    assert sampler.clock.monotonic() == 86400
+    assert sampler.output["get-cpu"]["result"] == 86400
+
+
+def test_simulate_paces_collectors_by_interval_or_profile(main):
+    calls, collect = counter()
+    main.simulate(3600, interval=5, collectors={"get-cpu": collect})
+    assert len(calls) == 720
+    calls.clear()
+    # No interval: the context profiles pick it, here the background one
+    sampler = main.simulate(3600, interval=None, collectors={"get-cpu": collect})
+    assert sampler.profile == "background"
+    assert len(calls) == 3600 // main.SAMPLING_PROFILES["background"]
+
+
+def test_simulate_publishes_every_cycle(main):
+    published = []
+    _, collect = counter()
+    sampler = main.simulate(
+        10,
+        collectors={"get-cpu": collect},
+        on_publish=lambda outputs: published.append(outputs["get-cpu"]["result"]),
+    )
+    assert published == list(range(1, 11))
+    assert sampler.clock.time() == sampler.clock.epoch + 10
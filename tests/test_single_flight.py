@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+
+def test_single_flight_shares_one_run(main):
+    clock = main.VirtualClock()
+    flight = main.SingleFlight(ttl=1, clock=clock)
+    calls = []
+
+    def scan(k):
+        calls.append(k)
+        threading.Event().wait(0.05)
+        return k * 2
+
+    async def burst():
+        results = await asyncio.gather(*(flight.run("scan", scan, 3) for _ in range(5)))
+        return results, await flight.run("scan", scan, 3)
+
+    results, memo = asyncio.run(burst())
+    assert results == [6] * 5 and memo == 6
+    assert calls == [3]
+    assert flight.snapshot() == {"runs": 1, "shared": 4, "hits": 1}
+
+
+def test_single_flight_survives_a_cancelled_caller_and_skips_failures(main):
+    flight = main.SingleFlight(ttl=1, clock=main.VirtualClock())
+    calls = []
+
+    def scan(k):
+        calls.append(k)
+        threading.Event().wait(0.05)
+        if len(calls) == 1:
+            raise OSError("gone")
+        return k
+
+    async def callers():
+        first = asyncio.ensure_future(flight.run("scan", scan, 1))
+        second = asyncio.ensure_future(flight.run("scan", scan, 1))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        # The scan runs on for the caller still waiting, and its error
+        # reaches that caller
+        failed = await asyncio.gather(second, return_exceptions=True)
+        # A failed scan is not memoized
+        return failed, await flight.run("scan", scan, 1)
+
+    (failed,), result = asyncio.run(callers())
+    assert isinstance(failed, OSError) and result == 1
+    assert calls == [1, 1]
@@ -0,0 +1,48 @@
+import asyncio
+import json
+import time
+
+
+def test_snapshot_round_trip(main, tree):
+    snapshot = main.SharedSnapshot(bytearray(main.SharedSnapshot.SIZE))
+    output = {
+        "get-cpu": {"result": 12.5, "debug": ""},
+        "get-memory": main.DeckySpy.get_memory(),
+        "get-battery": main.DeckySpy.get_battery(),
+        "get-net-interface": {"result": [], "debug": "", "stale": True},
+    }
+    snapshot.write(output, time.time())
+    read = snapshot.read()
+    assert json.dumps(read, sort_keys=True, default=main.to_wire) == json.dumps(
+        output, sort_keys=True, default=main.to_wire
+    )
+    assert snapshot.publishes() == 1
+
+
+def test_snapshot_serves_last_good_read_while_writing(main):
+    buf = bytearray(main.SharedSnapshot.SIZE)
+    snapshot = main.SharedSnapshot(buf)
+    snapshot.write({"get-cpu": {"result": 1.0, "debug": ""}}, time.time())
+    assert snapshot.read()["get-cpu"]["result"] == 1.0
+    # A writer that died mid-write leaves the sequence odd
+    snapshot.SEQ.pack_into(buf, 0, snapshot.SEQ.unpack_from(buf, 0)[0] + 1)
+    main.SharedSnapshot.FIXED.pack_into(
+        buf, snapshot.SEQ.size + snapshot.HEADER.size, 1, 99.0, *[0] * 10
+    )
+    snapshot.READ_RETRIES = 3
+    assert snapshot.read()["get-cpu"]["result"] == 1.0
+
+
+def test_process_sampler_serves_the_snapshot_its_worker_writes(main, tree):
+    sampler = main.ProcessSampler({"pins": [("get-memory", True)]})
+    sampler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while "get-memory" not in sampler.output:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        served = sampler.output["get-memory"]["result"]
+        sampled = main.DeckySpy.get_memory()["result"]
+        assert json.dumps(served) == json.dumps(sampled, default=main.to_wire)
+    finally:
+        assert asyncio.run(sampler.shutdown(2))
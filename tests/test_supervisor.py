@@ -0,0 +1,34 @@
+def test_supervisor_serves_last_good_and_backs_off(main):
+    supervisor = main.Supervisor(["get-cpu"])
+    assert supervisor.run("get-cpu", lambda: {"result": 1, "debug": ""})["result"] == 1
+
+    def broken():
+        raise OSError("gone")
+
+    out = supervisor.run("get-cpu", broken)
+    assert out == {"result": 1, "debug": "OSError: gone", "stale": True}
+    supervisor.run("get-cpu", broken)
+    assert supervisor.delay("get-cpu", 1, 1) == 4
+    supervisor.run("get-cpu", lambda: {"result": 2, "debug": ""})
+    assert supervisor.snapshot() == {}
+
+
+def test_failing_collector_is_isolated_and_retried_later(main):
+    def broken():
+        raise OSError("gone")
+
+    sampler = main.StatsThread(
+        clock=main.VirtualClock(),
+        collectors={
+            "get-cpu": lambda: {"result": 1, "debug": ""},
+            "get-battery": broken,
+        },
+    )
+    sampler.leases.pin(("get-cpu", "get-battery"))
+    sampler.parallel = False
+    sampler.interval = 1
+    outputs = sampler.collect(0)
+    assert outputs["get-cpu"] == {"result": 1, "debug": ""}
+    assert outputs["get-battery"]["stale"]
+    assert outputs["get-battery"]["debug"] == "OSError: gone"
+    assert sampler.next_due == {"get-cpu": 1, "get-battery": 2}
@@ -0,0 +1,69 @@
+import asyncio
+
+from conftest import write_cpu
+
+
+def test_first_cpu_reading_is_stale_and_held(main, tree):
+    procfs, _ = tree
+    write_cpu(procfs, user=1000, idle=9000)
+    first = main.DeckySpy.get_cpu()
+    assert first["result"] == 10.0
+    assert first["stale"] and first["bootstrap"]
+    # A few jiffies later: too short a window, the reading is kept
+    write_cpu(procfs, user=1001, idle=9001)
+    assert main.DeckySpy.get_cpu() == first
+    write_cpu(procfs, user=1000 + 10_000, idle=9000 + 10_000)
+    assert main.DeckySpy.get_cpu() == {"result": 50.0, "debug": ""}
+
+
+def test_thread_output_wakes_for_bootstrap_sections(main, tree):
+    plugin = main.Plugin()
+    plugin.stats_thread = sampler = main.StatsThread()
+    sampler.bootstrap()
+    for _ in range(2):
+        # Every call while the bootstrap sample is still served
+        sampler.wakeup.clear()
+        asyncio.run(main.Plugin.thread_output(plugin, "get-cpu"))
+        assert sampler.wakeup.is_set()
+    sampler.publish({"get-cpu": {"result": 12.5, "debug": ""}})
+    sampler.wakeup.clear()
+    asyncio.run(main.Plugin.thread_output(plugin, "get-cpu"))
+    assert not sampler.wakeup.is_set()
+
+
+def test_thread_output_carries_stale_flags(main, tree):
+    procfs, _ = tree
+    write_cpu(procfs, user=1000, idle=9000)
+    plugin = main.Plugin()
+    plugin.stats_thread = sampler = main.StatsThread()
+    sampler.bootstrap()
+    out = asyncio.run(main.Plugin.thread_output(plugin, "get-cpu"))
+    assert out["data"] == "10.0"
+    assert out["stale"] and out["bootstrap"] and "restored" not in out
+    sampler.publish({"get-cpu": {"result": 12.5, "debug": ""}})
+    out = asyncio.run(main.Plugin.thread_output(plugin, "get-cpu"))
+    assert out == {"code": 0, "data": "12.5"}
+
+
+def test_snapshot_of_live_sections_is_restored_stale(main, monkeypatch, tmp_path):
+    monkeypatch.setattr(main.decky_plugin, "DECKY_PLUGIN_RUNTIME_DIR", str(tmp_path))
+    plugin = main.Plugin()
+    plugin.stats_thread = main.StatsThread()
+    plugin.stats_thread.publish(
+        {
+            "get-memory": {"result": main.MemoryRecord(8, 4, 50.0, 0, 0, 0.0)},
+            "get-cpu": {"result": 10.0, "debug": "gone", "stale": True},
+        }
+    )
+    main.Plugin._save_snapshot(plugin)
+    restored = main.Plugin._load_snapshot(main.Plugin())
+    assert list(restored) == ["get-memory"]
+    memory = restored["get-memory"]
+    assert memory["stale"] and memory["restored"]
+    assert memory["result"]["vmem"] == {"total": 8, "used": 4, "percent": 50.0}
+    assert memory["debug"].startswith("restored from a snapshot taken")
+    # Never in place of a live section
+    sampler = main.StatsThread()
+    sampler.publish({"get-memory": {"result": "live", "debug": ""}})
+    sampler.restore(restored)
+    assert sampler.output["get-memory"]["result"] == "live"